@@ -0,0 +1,337 @@
+import csv
+import datetime
+import io
+import json
+import os
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from history import HISTORY_FILE, FIRED, ACKNOWLEDGED, KINDS, parse_line
+
+# Events handled per vectorized step when streaming the column files
+CHUNK_EVENTS = 1 << 20
+# Bytes of text log parsed per step when updating the column files
+INGEST_BYTES = 8 << 20
+
+# One raw file per column; kinds are stored as their index in history.KINDS
+COLUMNS = (
+    ("ts", "i8"),
+    ("kind", "u1"),
+    ("amount", "i4"),
+    ("interval", "i2"),
+    ("profile", "i4"),
+)
+
+FIRED_CODE = KINDS.index(FIRED)
+ACK_CODE = KINDS.index(ACKNOWLEDGED)
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Hydration reports need NumPy (pip install numpy)")
+
+class ColumnStore:
+    # Columnar copy of the history log: raw little-endian arrays that are
+    # memory-mapped for reading, plus a profile-name table. It is brought up
+    # to date incrementally, so only log lines appended since the last report
+    # are parsed.
+    def __init__(self, directory):
+        require_numpy()
+        self.directory = directory
+        self.meta_path = os.path.join(directory, "meta.json")
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {"offset": 0, "profiles": []}
+        self.offset = meta["offset"]
+        self.profiles = meta["profiles"]
+        self.profile_ids = {name: index for index, name in enumerate(self.profiles)}
+
+    @classmethod
+    def for_log(cls, log_path=HISTORY_FILE):
+        return cls(log_path + ".cols")
+
+    def path(self, name):
+        return os.path.join(self.directory, name + ".bin")
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path("ts")) // 8
+        except OSError:
+            return 0
+
+    def column(self, name):
+        dtype = dict(COLUMNS)[name]
+        if len(self) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.path(name), dtype=dtype, mode="r", shape=(len(self),))
+
+    def columns(self):
+        return {name: self.column(name) for name, _ in COLUMNS}
+
+    def append(self, ts, kind, amount, interval, profile_names):
+        # Append arrays of events; profile_names are strings
+        os.makedirs(self.directory, exist_ok=True)
+        names, inverse = np.unique(np.asarray(profile_names), return_inverse=True)
+        codes = np.array([self.profile_code(str(name)) for name in names], dtype="i4")
+        values = {
+            "ts": ts, "kind": kind, "amount": amount,
+            "interval": interval, "profile": codes[inverse],
+        }
+        for name, dtype in COLUMNS:
+            with open(self.path(name), "ab") as f:
+                np.ascontiguousarray(values[name], dtype=dtype).tofile(f)
+
+    def profile_code(self, name):
+        code = self.profile_ids.get(name)
+        if code is None:
+            code = self.profile_ids[name] = len(self.profiles)
+            self.profiles.append(name)
+        return code
+
+    def save_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": self.offset, "profiles": self.profiles}, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def update(self, log_path):
+        # Parse whatever the log gained since the last update; returns the
+        # number of new events
+        try:
+            size = os.path.getsize(log_path)
+        except OSError:
+            return 0
+        if size < self.offset:
+            # Log was replaced or truncated: rebuild from scratch
+            self.reset()
+        added = 0
+        with open(log_path, "rb") as f:
+            f.seek(self.offset)
+            pending = b""
+            while True:
+                block = f.read(INGEST_BYTES)
+                if not block:
+                    break
+                block = pending + block
+                cut = block.rfind(b"\n") + 1
+                pending = block[cut:]
+                if cut:
+                    added += self.ingest(block[:cut].decode("utf-8", "replace"))
+                    self.offset += cut
+        # A trailing partial line stays in the log for the next update
+        self.save_meta()
+        return added
+
+    def reset(self):
+        for name, _ in COLUMNS:
+            try:
+                os.unlink(self.path(name))
+            except OSError:
+                pass
+        self.offset = 0
+        self.profiles = []
+        self.profile_ids = {}
+
+    def ingest(self, text):
+        rows = [row for row in csv.reader(io.StringIO(text)) if len(row) >= 5]
+        if not rows:
+            return 0
+        if any(len(row) > 5 for row in rows):
+            # Profile names containing commas: rejoin the tail
+            rows = [row[:4] + [",".join(row[4:])] for row in rows]
+        ts, kind, amount, interval, profile = (np.array(column) for column in zip(*rows))
+        kind_codes = np.full(len(rows), 255, dtype="u1")
+        for code, name in enumerate(KINDS):
+            kind_codes[kind == name] = code
+        try:
+            ts = ts.astype("i8")
+            amount = amount.astype("i4")
+            interval = interval.astype("i2")
+        except ValueError:
+            # A torn line somewhere in the block: fall back to checking each one
+            return self.ingest_slow(text)
+        keep = kind_codes != 255
+        self.append(ts[keep], kind_codes[keep], amount[keep], interval[keep], profile[keep])
+        return int(keep.sum())
+
+    def ingest_slow(self, text):
+        events = [event for event in map(parse_line, text.splitlines()) if event]
+        if not events:
+            return 0
+        ts, kind, amount, interval, profile = zip(*events)
+        self.append(np.array(ts, dtype="i8"),
+                    np.array([KINDS.index(k) for k in kind], dtype="u1"),
+                    np.array(amount, dtype="i4"), np.array(interval, dtype="i2"),
+                    np.array(profile))
+        return len(events)
+
+def log_shards(log_path=HISTORY_FILE):
+    # The log plus the <log>.<n> shards written by --workers, in worker order
+    directory = os.path.dirname(log_path) or "."
+    pattern = re.compile(re.escape(os.path.basename(log_path)) + r"\.(\d+)$")
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        names = []
+    shards = sorted((int(match.group(1)), os.path.join(directory, match.group(0)))
+                    for match in map(pattern.match, names) if match)
+    return [log_path] + [path for _, path in shards]
+
+class MergedStore:
+    # Read-only union of several column stores (sharded history). Profile
+    # codes are remapped onto one table, so a profile whose events landed in
+    # more than one shard is still counted once.
+    def __init__(self, stores):
+        self.stores = stores
+        self.profiles = []
+        profile_ids = {}
+        self.code_maps = []
+        for store in stores:
+            codes = []
+            for name in store.profiles:
+                if name not in profile_ids:
+                    profile_ids[name] = len(self.profiles)
+                    self.profiles.append(name)
+                codes.append(profile_ids[name])
+            self.code_maps.append(np.array(codes, dtype="i4"))
+
+    def __len__(self):
+        return sum(len(store) for store in self.stores)
+
+    def columns(self):
+        # Each shard's memmaps stay as they are; chunks() walks them in turn
+        return MergedColumns([(store.columns(), code_map)
+                              for store, code_map in zip(self.stores, self.code_maps)])
+
+class MergedColumns:
+    # The columns of several stores, with the code map that takes each one's
+    # profile codes onto the merged profile table
+    def __init__(self, parts):
+        self.parts = parts
+
+    def __len__(self):
+        return sum(len(columns["ts"]) for columns, _ in self.parts)
+
+def open_history(log_path=HISTORY_FILE):
+    # Column store for the log and its shards, each brought up to date
+    stores = []
+    for path in log_shards(log_path):
+        store = ColumnStore.for_log(path)
+        store.update(path)
+        stores.append(store)
+    return stores[0] if len(stores) == 1 else MergedStore(stores)
+
+def event_count(columns):
+    return len(columns) if isinstance(columns, MergedColumns) else len(columns["ts"])
+
+def chunks(columns, size=CHUNK_EVENTS):
+    # Stream equally sized slices of every column; merged columns are walked
+    # one store at a time, with profile codes remapped chunk by chunk
+    if isinstance(columns, MergedColumns):
+        for part, code_map in columns.parts:
+            for chunk in chunks(part, size):
+                chunk["profile"] = code_map[chunk["profile"]]
+                yield chunk
+        return
+    total = len(columns["ts"])
+    for start in range(0, total, size):
+        yield {name: column[start:start + size] for name, column in columns.items()}
+
+def week_of(ts):
+    # Monday-based week number; day 0 (1970-01-01) was a Thursday
+    return (ts // 86400 + 3) // 7
+
+def compliance_by_hour(columns):
+    fired = np.zeros(24, dtype="i8")
+    acked = np.zeros(24, dtype="i8")
+    for chunk in chunks(columns):
+        hour = (chunk["ts"] // 3600) % 24
+        kind = chunk["kind"]
+        fired += np.bincount(hour[kind == FIRED_CODE], minlength=24)
+        acked += np.bincount(hour[kind == ACK_CODE], minlength=24)
+    return [
+        {"hour": hour, "fired": int(fired[hour]), "acknowledged": int(acked[hour]),
+         "rate": round(acked[hour] / fired[hour], 3) if fired[hour] else None}
+        for hour in range(24)
+    ]
+
+def weekly_intake(columns, profiles, goals, default_goal):
+    # mL acknowledged per profile per week against 7 * daily_goal_ml
+    if event_count(columns) == 0:
+        return []
+    first = last = None
+    for chunk in chunks(columns):
+        weeks = week_of(chunk["ts"])
+        low, high = int(weeks.min()), int(weeks.max())
+        first = low if first is None else min(first, low)
+        last = high if last is None else max(last, high)
+    span = last - first + 1
+
+    consumed = np.zeros(len(profiles) * span, dtype="i8")
+    for chunk in chunks(columns):
+        acked = chunk["kind"] == ACK_CODE
+        key = chunk["profile"][acked].astype("i8") * span + (week_of(chunk["ts"][acked]) - first)
+        consumed += np.bincount(key, weights=chunk["amount"][acked],
+                                minlength=len(consumed)).astype("i8")
+
+    goal = np.array([goals.get(name, default_goal) for name in profiles], dtype="i8") * 7
+    profile_index, week_index = np.nonzero(consumed.reshape(len(profiles), span))
+    epoch = datetime.date(1970, 1, 1)
+    rows = []
+    for p, w in zip(profile_index.tolist(), week_index.tolist()):
+        ml = int(consumed[p * span + w])
+        week_start = epoch + datetime.timedelta(days=(first + w) * 7 - 3)
+        rows.append({"profile": profiles[p], "week": week_start.isoformat(),
+                     "consumed_ml": ml, "goal_ml": int(goal[p]),
+                     "ratio": round(ml / goal[p], 3) if goal[p] else None})
+    return rows
+
+def interval_effectiveness(columns):
+    # Acknowledgement rate per reminder_interval_min in force at the time
+    fired = np.zeros(0, dtype="i8")
+    acked = np.zeros(0, dtype="i8")
+    for chunk in chunks(columns):
+        interval = chunk["interval"].astype("i8")
+        kind = chunk["kind"]
+        size = int(interval.max()) + 1 if len(interval) else 0
+        f = np.bincount(interval[kind == FIRED_CODE], minlength=size)
+        a = np.bincount(interval[kind == ACK_CODE], minlength=size)
+        size = max(size, len(fired))
+        fired = np.pad(fired, (0, size - len(fired))) + np.pad(f, (0, size - len(f)))
+        acked = np.pad(acked, (0, size - len(acked))) + np.pad(a, (0, size - len(a)))
+    return [
+        {"interval_min": int(interval), "fired": int(fired[interval]),
+         "acknowledged": int(acked[interval]),
+         "rate": round(acked[interval] / fired[interval], 3)}
+        for interval in np.nonzero(fired)[0]
+    ]
+
+def build_report(store, goals=None, default_goal=2000):
+    columns = store.columns()
+    return {
+        "events": event_count(columns),
+        "compliance_by_hour": compliance_by_hour(columns),
+        "weekly_intake": weekly_intake(columns, store.profiles, goals or {}, default_goal),
+        "interval_effectiveness": interval_effectiveness(columns),
+    }
+
+def format_report(report):
+    lines = [f"💧 Hydration report ({report['events']} events)", "",
+             "Compliance by hour of day:"]
+    for row in report["compliance_by_hour"]:
+        if row["fired"]:
+            lines.append(f"  {row['hour']:02d}:00  {row['acknowledged']:>8}/{row['fired']:<8} {row['rate']:.0%}")
+    lines += ["", "Weekly intake vs goal:"]
+    for row in report["weekly_intake"]:
+        lines.append(f"  {row['profile']:<20} week of {row['week']}  "
+                     f"{row['consumed_ml']:>7}/{row['goal_ml']} mL ({row['ratio']:.0%})")
+    lines += ["", "Acknowledgement rate by reminder interval:"]
+    for row in report["interval_effectiveness"]:
+        lines.append(f"  every {row['interval_min']:>3} min  "
+                     f"{row['acknowledged']:>8}/{row['fired']:<8} {row['rate']:.0%}")
+    return "\n".join(lines)
@@ -0,0 +1,111 @@
+"""Hydration report rollups over a synthetic reminder history.
+
+Builds a memory-mapped column store of --events synthetic events (fired
+reminders and their acknowledgements across --profiles users over
+--weeks weeks), then times each rollup. Text-log ingest speed is measured
+separately on --ingest-lines lines. Prints JSON.
+
+    python benchmarks/bench_analytics.py --events 10000000
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+
+import analytics
+from common import rss_kb
+from history import KINDS, local_timestamp
+
+def synthesize(store, events, profiles, weeks, seed):
+    # Pairs of fired/acknowledged events during working hours, written in
+    # chunks so generating the data never holds all of it in memory either
+    rng = np.random.default_rng(seed)
+    names = np.array([f"user-{index}" for index in range(profiles)])
+    start = local_timestamp(datetime.datetime(2026, 1, 5))
+    intervals = np.array([15, 20, 30, 45, 60, 90], dtype="i2")
+    written = 0
+    while written < events:
+        n = min(analytics.CHUNK_EVENTS, events - written)
+        day = rng.integers(0, weeks * 7, n)
+        minute = rng.integers(7 * 60, 19 * 60, n)
+        ts = start + day * 86400 + minute * 60
+        profile = rng.integers(0, profiles, n)
+        interval = intervals[profile % len(intervals)]
+        # Longer intervals get acknowledged a little more often
+        acked = rng.random(n) < 0.45 + interval / 400
+        kind = np.where(np.arange(n) % 2 == 0, KINDS.index("F"),
+                        np.where(acked, KINDS.index("A"), KINDS.index("T"))).astype("u1")
+        amount = rng.choice(np.array([150, 200, 250, 300], dtype="i4"), n)
+        store.append(ts, kind, amount, interval, names[profile])
+        written += n
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, round(time.perf_counter() - started, 3)
+
+def ingest_rate(directory, lines, seed):
+    # Parse a text log the way `hydrator report` does on first run
+    rng = np.random.default_rng(seed)
+    log_path = os.path.join(directory, "ingest.log")
+    with open(log_path, "w") as f:
+        for index in range(lines):
+            kind = "F" if index % 2 == 0 else "A"
+            f.write(f"{1767571200 + index * 60},{kind},250,30,user-{rng.integers(0, 1000)}\n")
+    store = analytics.ColumnStore.for_log(log_path)
+    added, seconds = timed(store.update, log_path)
+    return {"lines": added, "seconds": seconds,
+            "lines_per_second": round(added / seconds) if seconds else None}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000000)
+    parser.add_argument("--profiles", type=int, default=5000)
+    parser.add_argument("--weeks", type=int, default=12)
+    parser.add_argument("--ingest-lines", type=int, default=500000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix="hydrator-bench-")
+    try:
+        store = analytics.ColumnStore(os.path.join(directory, "synthetic.cols"))
+        _, synth_seconds = timed(synthesize, store, args.events, args.profiles,
+                                 args.weeks, args.seed)
+        store.save_meta()
+        store = analytics.ColumnStore(store.directory)
+        columns = store.columns()
+        rss_mapped = rss_kb()
+
+        hours, hours_seconds = timed(analytics.compliance_by_hour, columns)
+        weekly, weekly_seconds = timed(analytics.weekly_intake, columns, store.profiles, {}, 2000)
+        intervals, interval_seconds = timed(analytics.interval_effectiveness, columns)
+
+        result = {
+            "benchmark": "analytics",
+            "events": len(store),
+            "profiles": len(store.profiles),
+            "synthesize_seconds": synth_seconds,
+            "rollup_seconds": {
+                "compliance_by_hour": hours_seconds,
+                "weekly_intake": weekly_seconds,
+                "interval_effectiveness": interval_seconds,
+            },
+            "weekly_rows": len(weekly),
+            "interval_rates": {row["interval_min"]: row["rate"] for row in intervals},
+            "rss_kb": {"mapped": rss_mapped, "after_rollups": rss_kb()},
+            "ingest": ingest_rate(directory, args.ingest_lines, args.seed),
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
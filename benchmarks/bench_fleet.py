@@ -0,0 +1,92 @@
+"""Schedule a large fleet of profiles through one simulated day.
+
+Reports per-event dispatch latency (time from the start of a tick to the
+dispatch callback) and resident memory, as JSON on stdout.
+
+    python benchmarks/bench_fleet.py --profiles 100000
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import sys
+import time
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common import rss_kb
+from fleet import FleetScheduler, minute_key
+
+def random_settings(rng):
+    start = rng.randrange(6 * 60, 10 * 60)
+    end = start + rng.randrange(6 * 60, 11 * 60)
+    settings = {
+        "start_time": f"{start // 60:02d}:{start % 60:02d}",
+        "end_time": f"{min(end, 1439) // 60:02d}:{min(end, 1439) % 60:02d}",
+        "reminder_interval_min": rng.choice((15, 20, 30, 45, 60, 90)),
+        "water_per_reminder": rng.choice((150, 200, 250, 300)),
+    }
+    if rng.random() < 0.1:
+        settings["custom_times"] = ["12:30", "16:45"]
+    return settings
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def run(profiles, seed):
+    rng = random.Random(seed)
+    day = datetime.datetime(2026, 1, 5)
+    first_key = minute_key(day)
+
+    latencies = array('q')
+    tick_started = [0]
+    perf_counter_ns = time.perf_counter_ns
+
+    def dispatch(profile, key):
+        latencies.append(perf_counter_ns() - tick_started[0])
+
+    rss_before = rss_kb()
+    fleet = FleetScheduler(dispatch)
+    started = time.perf_counter()
+    for index in range(profiles):
+        fleet.add_profile(f"user-{index}", random_settings(rng), now=day)
+    setup_seconds = time.perf_counter() - started
+    rss_loaded = rss_kb()
+
+    busiest = 0
+    started = time.perf_counter()
+    for key in range(first_key, first_key + 1440):
+        tick_started[0] = perf_counter_ns()
+        busiest = max(busiest, fleet.tick(key))
+    day_seconds = time.perf_counter() - started
+
+    latencies = sorted(latencies)
+    return {
+        "benchmark": "fleet_day",
+        "profiles": profiles,
+        "events": len(latencies),
+        "setup_seconds": round(setup_seconds, 3),
+        "simulated_day_seconds": round(day_seconds, 3),
+        "events_per_second": round(len(latencies) / day_seconds) if day_seconds else None,
+        "busiest_tick_events": busiest,
+        "dispatch_latency_us": {
+            "p50": round(percentile(latencies, 0.50) / 1000, 1),
+            "p99": round(percentile(latencies, 0.99) / 1000, 1),
+            "max": round(latencies[-1] / 1000, 1) if latencies else 0,
+        },
+        "rss_kb": {"before": rss_before, "loaded": rss_loaded, "after_day": rss_kb()},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.profiles, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Wakeups and CPU time of the reminder loop over simulated days.
+
+Runs ReminderEngine.reminder_loop on a clock.VirtualClock: the loop's waits
+advance simulated time instead of sleeping, so a day runs in milliseconds. Every wait is one wakeup. The original 30 s polling loop is
+stepped over the same days for comparison. Prints JSON.
+
+    python benchmarks/bench_loop.py --days 7
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import engine
+from clock import VirtualClock
+from common import SETTINGS, NullHistory, NullStore
+from legacy import LegacySchedule
+
+class CountingNotifier:
+    def __init__(self, clock):
+        self.clock = clock
+        self.fired = []
+
+    def notify(self, message, amount):
+        self.fired.append(self.clock.now())
+
+def run_engine(days):
+    start = datetime.datetime(2026, 1, 5)
+    clock = VirtualClock(start, start + datetime.timedelta(days=days))
+    notifier = CountingNotifier(clock)
+    reminder_engine = engine.ReminderEngine(notifier=notifier, store=NullStore(),
+                                            history=NullHistory(), clock=clock)
+    clock.on_stop = reminder_engine.stop
+
+    cpu = time.process_time()
+    reminder_engine.run()
+    cpu = time.process_time() - cpu
+
+    # Firing error: how far after its slot each reminder went out
+    errors = [(moment - moment.replace(second=0, microsecond=0)).total_seconds()
+              for moment in notifier.fired]
+    return {
+        "wakeups_per_day": round(clock.waits / days, 1),
+        "fired_per_day": round(len(notifier.fired) / days, 1),
+        "cpu_ms_per_day": round(cpu * 1000 / days, 3),
+        "max_fire_error_seconds": max(errors) if errors else 0,
+    }
+
+def run_legacy(days):
+    legacy = LegacySchedule(SETTINGS)
+    wakeups = fired = 0
+    cpu = time.process_time()
+    for offset in range(days):
+        day_wakeups, day_fired = legacy.simulate_day(datetime.date(2026, 1, 5) + datetime.timedelta(days=offset))
+        wakeups += day_wakeups
+        fired += day_fired
+    cpu = time.process_time() - cpu
+    return {
+        "wakeups_per_day": round(wakeups / days, 1),
+        "fired_per_day": round(fired / days, 1),
+        "cpu_ms_per_day": round(cpu * 1000 / days, 3),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7)
+    args = parser.parse_args(argv)
+    print(json.dumps({
+        "benchmark": "reminder_loop",
+        "days": args.days,
+        "expected_per_day": len(engine.DailySchedule.from_settings(SETTINGS)),
+        "engine": run_engine(args.days),
+        "legacy_polling": run_legacy(args.days),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
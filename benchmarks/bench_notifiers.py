@@ -0,0 +1,98 @@
+"""Cost of notifier delivery to the scheduler, with a slow webhook relay.
+
+Every tick, a whole roster's reminders are handed to a notifiers.Dispatcher
+that sends them to a stub relay (relay_stub.py) answering after --delay, and
+as JSON lines to /dev/null. We time the scheduler-side notify_batch call and
+how long the batches take to land. The legacy figure is a blocking POST per
+reminder from the scheduler thread, which is what a synchronous notifier
+would cost. Prints JSON.
+
+    python benchmarks/bench_notifiers.py --profiles 1000 --ticks 20 --delay 0.05
+"""
+import argparse
+import datetime
+import http.client
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics import Metrics
+from notifiers import Dispatcher, JsonLinesBackend, Reminder, WebhookBackend
+from relay_stub import StubRelay
+
+# Reminders POSTed one at a time for the legacy comparison
+LEGACY_SAMPLE = 20
+
+def legacy_blocking(relay, moment):
+    # Seconds per reminder when the scheduler waits for each POST
+    connection = http.client.HTTPConnection("127.0.0.1", relay.port)
+    started = time.perf_counter()
+    for index in range(LEGACY_SAMPLE):
+        reminder = Reminder(f"user-{index}", "Time to drink water!", 250, moment)
+        body = json.dumps({"reminders": [reminder.as_dict()]}).encode()
+        connection.request("POST", "/reminders", body, {"Content-Type": "application/json"})
+        connection.getresponse().read()
+    connection.close()
+    return (time.perf_counter() - started) / LEGACY_SAMPLE
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.05, metavar="SECONDS",
+                        help="relay response time (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    relay = StubRelay(delay=args.delay).start()
+    metrics = Metrics()
+    devnull = open(os.devnull, "w")
+    dispatcher = Dispatcher([WebhookBackend(relay.url), JsonLinesBackend(devnull)], metrics)
+    dispatcher.start()
+    moment = datetime.datetime(2026, 1, 5, 9, 0)
+    total = args.profiles * args.ticks
+
+    call_seconds = []
+    started = time.perf_counter()
+    for tick in range(args.ticks):
+        batch = [Reminder(f"user-{index}", "Time to drink water!", 250, moment)
+                 for index in range(args.profiles)]
+        before = time.perf_counter()
+        dispatcher.notify_batch(batch)
+        call_seconds.append(time.perf_counter() - before)
+        # Ticks arrive faster than the relay answers, so batches pile up
+        time.sleep(args.delay / 4)
+    while relay.reminders < total and time.perf_counter() - started < 60:
+        time.sleep(0.01)
+    delivered_seconds = time.perf_counter() - started
+    dispatcher.close()
+    devnull.close()
+    delivered, requests, connections = relay.reminders, relay.requests, relay.connections
+
+    legacy = legacy_blocking(relay, moment)
+    relay.close()
+
+    call_seconds.sort()
+    result = {
+        "benchmark": "notifier_delivery",
+        "profiles": args.profiles,
+        "ticks": args.ticks,
+        "relay_delay_seconds": args.delay,
+        "notify_batch_us": {
+            "median": round(call_seconds[len(call_seconds) // 2] * 1e6, 1),
+            "max": round(call_seconds[-1] * 1e6, 1),
+        },
+        "notify_batch_us_per_reminder": round(sum(call_seconds) / total * 1e6, 3),
+        "legacy_blocking_us_per_reminder": round(legacy * 1e6, 1),
+        "delivered": delivered,
+        "delivery_seconds": round(delivered_seconds, 3),
+        "relay_requests": requests,
+        "relay_connections": connections,
+        "failures": metrics.notify_failures.get("webhook"),
+    }
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
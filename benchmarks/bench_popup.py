@@ -0,0 +1,120 @@
+"""Latency from a reminder firing to its popup being on screen.
+
+With a display (or Xvfb) this drives the real WaterReminderGUI: reminders are
+fired from a background thread through ReminderEngine.fire, and we time the
+hand-off to show_water_reminder plus the popup's own show-to-mapped latency.
+Without one, the Tk side is replaced by a stub consumer that drains the same
+ReminderChannel, which still measures the cross-thread hand-off. Prints JSON.
+
+    python benchmarks/bench_popup.py --reminders 50
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common import NullHistory, NullStore, ensure_display
+from engine import ReminderChannel, ReminderEngine
+
+# Gap between fired reminders so each one gets its own popup
+SPACING_SECONDS = 0.05
+
+def summary_ms(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "median": round(statistics.median(values) * 1000, 3),
+        "p95": round(values[int(0.95 * (len(values) - 1))] * 1000, 3),
+        "max": round(values[-1] * 1000, 3),
+    }
+
+def fire_in_background(engine, fired_at, count):
+    def fire():
+        for _ in range(count):
+            fired_at.append(time.perf_counter())
+            engine.fire()
+            time.sleep(SPACING_SECONDS)
+    thread = threading.Thread(target=fire, daemon=True)
+    thread.start()
+    return thread
+
+def run_tk(count):
+    from gui import WaterReminderGUI
+
+    engine = ReminderEngine(store=NullStore(), history=NullHistory())
+    app = WaterReminderGUI(engine)
+    fired_at = []
+    shown_at = []
+    show = app.show_water_reminder
+
+    def show_water_reminder(amount, reminders=1, fired_at=None):
+        shown_at.append(time.perf_counter())
+        show(amount, reminders, fired_at)
+        # Acknowledge right away so the next reminder maps a fresh window
+        app.root.after(int(SPACING_SECONDS * 500), app.popup.hide)
+    app.show_water_reminder = show_water_reminder
+
+    fire_in_background(engine, fired_at, count)
+
+    def finish():
+        if len(shown_at) < count and time.perf_counter() - fired_at[0] < count * SPACING_SECONDS * 4 + 5:
+            app.root.after(50, finish)
+            return
+        app.root.destroy()
+    app.root.after(100, finish)
+    app.root.mainloop()
+
+    return {
+        "mode": "tk",
+        "reminders": count,
+        "popups": len(shown_at),
+        "fire_to_show_ms": summary_ms([s - f for f, s in zip(fired_at, shown_at)]),
+        "show_to_mapped_ms": summary_ms(list(app.popup.show_latencies)),
+    }
+
+def run_stub(count):
+    # The Tk thread replaced by a thread that waits for the channel wake-up
+    ready = threading.Event()
+    channel = ReminderChannel(on_ready=ready.set)
+    engine = ReminderEngine(notifier=channel, store=NullStore(), history=NullHistory())
+    fired_at = []
+    drained_at = []
+
+    thread = fire_in_background(engine, fired_at, count)
+    while len(drained_at) < count and (thread.is_alive() or ready.is_set()):
+        if ready.wait(0.5):
+            ready.clear()
+            if channel.drain():
+                drained_at.append(time.perf_counter())
+
+    return {
+        "mode": "stub",
+        "reminders": count,
+        "popups": len(drained_at),
+        "fire_to_show_ms": summary_ms([d - f for f, d in zip(fired_at, drained_at)]),
+        "show_to_mapped_ms": None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reminders", type=int, default=50)
+    parser.add_argument("--stub", action="store_true", help="skip Tk even if a display exists")
+    args = parser.parse_args(argv)
+
+    has_display, server = (False, None) if args.stub else ensure_display()
+    try:
+        result = run_tk(args.reminders) if has_display else run_stub(args.reminders)
+    finally:
+        if server:
+            server.terminate()
+    result["benchmark"] = "popup_latency"
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare per-profile memory of the dict/set layout and the slots/bitmap layout.
+
+Each layout is built in its own child process so the RSS numbers don't mix.
+Every profile gets a typical day of fired reminders before measuring.
+
+    python benchmarks/bench_profile_memory.py --profiles 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common import rss_kb
+from engine import DEFAULT_SETTINGS, DailySchedule
+from fleet import Profile
+
+LAYOUTS = ("dict", "slots")
+
+class DictProfile:
+    # The layout Profile had before: a merged settings dict and a set of minutes
+    def __init__(self, profile_id, settings, schedule):
+        self.id = profile_id
+        self.settings = settings
+        self.schedule = schedule
+        self.triggered_times = set()
+        self.day = None
+        self.generation = 0
+
+def build(layout, count):
+    schedule = DailySchedule("08:00", "18:00", 30)
+    record = DictProfile if layout == "dict" else Profile
+    fired = schedule.offsets[:16]
+
+    profiles = []
+    for index in range(count):
+        # Fresh dicts and strings per profile, as if parsed from a roster file
+        settings = {**DEFAULT_SETTINGS, "custom_message": "Time to drink water!"[:-1] + "!",
+                    "start_time": "08:00", "end_time": "18:00"}
+        profile = record(f"user-{index}", settings, schedule)
+        for minute in fired:
+            profile.triggered_times.add(minute)
+        profiles.append(profile)
+    return profiles
+
+def measure(layout, count):
+    gc.collect()
+    before = rss_kb()
+    profiles = build(layout, count)
+    gc.collect()
+    after = rss_kb()
+    return {
+        "layout": layout,
+        "profiles": len(profiles),
+        "rss_kb": after - before,
+        "bytes_per_profile": round((after - before) * 1024 / count, 1),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=1000000)
+    parser.add_argument("--layout", choices=LAYOUTS,
+                        help="measure a single layout in this process")
+    args = parser.parse_args(argv)
+
+    if args.layout:
+        print(json.dumps(measure(args.layout, args.profiles)))
+        return
+
+    results = []
+    for layout in LAYOUTS:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__),
+             "--profiles", str(args.profiles), "--layout", layout],
+            check=True, capture_output=True, text=True).stdout
+        results.append(json.loads(output))
+    print(json.dumps({
+        "benchmark": "profile_memory",
+        "results": results,
+        "ratio": round(results[0]["rss_kb"] / max(results[1]["rss_kb"], 1), 2),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Per-call cost of the schedule queries, before and after compilation.
+
+Times should_show_reminder, get_next_reminder_time and
+calculate_daily_reminders on the engine (compiled DailySchedule) and on the
+original strptime-based code, over a spread of times of day. Prints JSON.
+
+    python benchmarks/bench_schedule.py
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine import DailySchedule, ReminderEngine
+from common import SETTINGS, NullHistory, NullStore
+from legacy import LegacySchedule
+
+def sample_times(count):
+    # Evenly spread over a day, including off-minute seconds
+    day = datetime.datetime(2026, 1, 5)
+    step = 86400 / count
+    return [day + datetime.timedelta(seconds=int(index * step) + 17) for index in range(count)]
+
+def per_call_ns(function, times, repeat):
+    # Best of `repeat` passes over every sample time
+    def run():
+        for now in times:
+            function(now)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return round(best / len(times) * 1e9, 1)
+
+def run(samples, repeat):
+    times = sample_times(samples)
+    engine = ReminderEngine(store=NullStore(), history=NullHistory())
+    legacy = LegacySchedule(SETTINGS)
+    schedule = engine.schedule
+
+    result = {"benchmark": "schedule_queries", "samples": samples, "per_call_ns": {}}
+    calls = result["per_call_ns"]
+    calls["engine"] = {
+        "should_show_reminder": per_call_ns(engine.should_show_reminder, times, repeat),
+        "get_next_reminder_time": per_call_ns(engine.get_next_reminder_time, times, repeat),
+        "calculate_daily_reminders": per_call_ns(lambda now: engine.calculate_daily_reminders(), times, repeat),
+    }
+    calls["daily_schedule"] = {
+        "is_due": per_call_ns(schedule.is_due, times, repeat),
+        "next_reminder": per_call_ns(schedule.next_reminder, times, repeat),
+        "count_remaining": per_call_ns(schedule.count_remaining, times, repeat),
+    }
+    calls["legacy"] = {
+        "should_show_reminder": per_call_ns(legacy.should_show_reminder, times, repeat),
+        "get_next_reminder_time": per_call_ns(legacy.get_next_reminder_time, times, repeat),
+        "calculate_daily_reminders": per_call_ns(lambda now: legacy.calculate_daily_reminders(), times, repeat),
+    }
+    started = timeit.default_timer()
+    for _ in range(repeat * 10):
+        DailySchedule.from_settings(SETTINGS)
+    result["compile_us"] = round((timeit.default_timer() - started) / (repeat * 10) * 1e6, 1)
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.samples, args.repeat), indent=2))
+
+if __name__ == "__main__":
+    main()
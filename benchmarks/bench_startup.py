@@ -0,0 +1,143 @@
+"""Cold-start time from main() to the first idle moment, with a budget check.
+
+Each run is a fresh interpreter in an empty directory (so settings are
+created from scratch, as on a first launch). Headless mode is idle once the
+reminder loop starts; the GUI and --background launches are idle at the
+first Tk after_idle callback, measured only when a display (or Xvfb) is
+available. Prints JSON. With --check, exits 1 if any mode's median process
+time is over its budget in BUDGETS_MS (scaled by --budget-scale on slow
+machines).
+
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --check --budget-scale 2
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from common import ensure_display
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Median process wall time per launch mode, interpreter start included
+BUDGETS_MS = {"headless": 250, "background": 400, "gui": 900}
+
+MODES = {
+    "headless": ["--headless"],
+    "background": ["--background"],
+    "gui": [],
+}
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+idle = []
+
+import engine
+import hydrator
+imported = time.perf_counter()
+
+def reminder_loop(self):
+    if not {gui!r}:
+        idle.append(time.perf_counter())
+engine.ReminderEngine.reminder_loop = reminder_loop
+
+if {gui!r}:
+    import gui
+    def run(self):
+        def done():
+            idle.append(time.perf_counter())
+            self.engine.close()
+            self.root.destroy()
+        self.root.after_idle(done)
+        self.root.mainloop()
+    gui.WaterReminderGUI.run = run
+
+called = time.perf_counter()
+hydrator.main({argv!r})
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "main_to_idle_ms": (idle[0] - called) * 1000,
+    "tk_loaded": "tkinter" in sys.modules,
+    "ttk_loaded": "tkinter.ttk" in sys.modules,
+    "modules": len(sys.modules),
+}}))
+'''
+
+def measure(mode, runs):
+    # A private instance name so a running Hydrator isn't contacted instead
+    argv = MODES[mode] + ["--instance", f"bench-startup-{os.getpid()}"]
+    code = CHILD.format(root=os.path.abspath(ROOT), gui=mode != "headless", argv=argv)
+    samples = []
+    for _ in range(runs):
+        directory = tempfile.mkdtemp(prefix="hydrator-start-")
+        try:
+            started = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", code], cwd=directory,
+                                    check=True, capture_output=True, text=True).stdout
+            wall = (time.perf_counter() - started) * 1000
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample["process_wall_ms"] = wall
+        samples.append(sample)
+
+    def summary(key):
+        values = [sample[key] for sample in samples]
+        return {"median": round(statistics.median(values), 2), "min": round(min(values), 2)}
+
+    return {
+        "runs": runs,
+        "main_to_idle_ms": summary("main_to_idle_ms"),
+        "import_ms": summary("import_ms"),
+        "process_wall_ms": summary("process_wall_ms"),
+        "tk_loaded": samples[0]["tk_loaded"],
+        "ttk_loaded": samples[0]["ttk_loaded"],
+        "modules": samples[0]["modules"],
+    }
+
+def over_budget(result, scale):
+    found = []
+    for mode, budget in BUDGETS_MS.items():
+        measured = result.get(mode, {}).get("process_wall_ms")
+        if measured and measured["median"] > budget * scale:
+            found.append({"mode": mode, "median_ms": measured["median"],
+                          "budget_ms": budget * scale})
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true",
+                        help="exit 1 if a launch mode is over its startup budget")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every budget, for slow CI machines")
+    args = parser.parse_args(argv)
+
+    result = {"benchmark": "startup", "headless": measure("headless", args.runs)}
+    has_display, server = ensure_display()
+    try:
+        for mode in ("background", "gui"):
+            if has_display:
+                result[mode] = measure(mode, args.runs)
+            else:
+                result[mode] = {"skipped": "no display and no Xvfb"}
+    finally:
+        if server:
+            server.terminate()
+    result["over_budget"] = over_budget(result, args.budget_scale)
+    print(json.dumps(result, indent=2))
+    if args.check and result["over_budget"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
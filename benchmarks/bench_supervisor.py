@@ -0,0 +1,107 @@
+"""Reminder throughput of the sharded supervisor against worker count.
+
+Replays one simulated day for a roster of profiles. Every reminder does the
+work a real dispatch does: a history log line plus the rendered message,
+streamed back to the supervisor. The single-process FleetScheduler doing the
+same work is the baseline. Scaling flattens once workers exceed cores, so
+cpu_count is reported alongside. Prints JSON.
+
+    python benchmarks/bench_supervisor.py --profiles 20000 --workers 1 2 4
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_fleet import random_settings
+from fleet import FleetScheduler, minute_key
+from history import HistoryLog
+from supervisor import Supervisor
+
+DAY = datetime.datetime(2026, 1, 5)
+
+def roster(profiles, seed):
+    rng = random.Random(seed)
+    return {f"user-{index}": random_settings(rng) for index in range(profiles)}
+
+def run_single(profiles, directory):
+    history = HistoryLog(os.path.join(directory, "single.log"))
+    received = []
+
+    def dispatch(profile, key):
+        received.append((profile.id, key, profile.water_per_reminder,
+                         f"{profile.id}: {profile.custom_message}"))
+
+    fleet = FleetScheduler(dispatch, history)
+    for profile_id, settings in profiles.items():
+        fleet.add_profile(profile_id, settings, now=DAY)
+    first_key = minute_key(DAY)
+    started = time.perf_counter()
+    for key in range(first_key, first_key + 1440):
+        fleet.tick(key)
+    seconds = time.perf_counter() - started
+    history.close()
+    return len(received), seconds
+
+def run_sharded(profiles, workers, directory):
+    received = [0]
+
+    def on_events(events):
+        received[0] += len(events)
+
+    supervisor = Supervisor(workers, on_events, os.path.join(directory, f"sharded-{workers}.log"),
+                            live=False)
+    supervisor.start()
+    try:
+        supervisor.add_profiles(profiles, now=DAY)
+        fired, seconds = supervisor.replay(minute_key(DAY), 1440)
+    finally:
+        supervisor.close()
+    return received[0], seconds
+
+def rate(events, seconds):
+    return round(events / seconds) if seconds else None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    profiles = roster(args.profiles, args.seed)
+    directory = tempfile.mkdtemp(prefix="hydrator-supervisor-")
+    try:
+        events, seconds = run_single(profiles, directory)
+        single = rate(events, seconds)
+        result = {
+            "benchmark": "supervisor_throughput",
+            "profiles": args.profiles,
+            "cpu_count": os.cpu_count(),
+            "single_process": {"events": events, "seconds": round(seconds, 3),
+                               "events_per_second": single},
+            "sharded": [],
+        }
+        for workers in args.workers:
+            events, seconds = run_sharded(profiles, workers, directory)
+            result["sharded"].append({
+                "workers": workers,
+                "events": events,
+                "seconds": round(seconds, 3),
+                "events_per_second": rate(events, seconds),
+                "speedup": round(rate(events, seconds) / single, 2) if single else None,
+            })
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Shared helpers for the benchmark scripts
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine import DEFAULT_SETTINGS
+from history import NullHistory
+from settings_store import StaticSettings
+
+# A typical single-user day: every 30 min from 08:00 to 18:00 plus two extras
+SETTINGS = {**DEFAULT_SETTINGS, "start_time": "08:00", "end_time": "18:00",
+            "reminder_interval_min": 30, "custom_times": ["12:15", "16:45"]}
+
+def rss_kb():
+    # Current resident set size; falls back to peak RSS off Linux
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class NullStore(StaticSettings):
+    # Fixed in-memory settings: no file I/O, no watcher
+    def __init__(self, settings=SETTINGS):
+        super().__init__(settings)
+
+def ensure_display():
+    # True if Tk can open a window: an existing $DISPLAY, or a private Xvfb
+    # started here (returned so the caller can terminate it)
+    import shutil
+    import subprocess
+    import time
+    if sys.platform == "win32" or sys.platform == "darwin" or os.environ.get("DISPLAY"):
+        return True, None
+    if not shutil.which("Xvfb"):
+        return False, None
+    display = ":97"
+    server = subprocess.Popen(["Xvfb", display, "-nolisten", "tcp"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    if server.poll() is not None:
+        return False, None
+    os.environ["DISPLAY"] = display
+    return True, server
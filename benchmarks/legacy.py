@@ -0,0 +1,91 @@
+# The scheduling code as it was before the compiled schedule and the
+# deadline-driven loop, kept only so benchmarks can report before/after.
+import datetime
+
+POLL_SECONDS = 30
+
+class LegacySchedule:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def get_next_reminder_time(self, now):
+        try:
+            start_time = datetime.datetime.strptime(self.settings["start_time"], "%H:%M").time()
+            end_time = datetime.datetime.strptime(self.settings["end_time"], "%H:%M").time()
+            interval = self.settings["reminder_interval_min"]
+
+            current_time = now.time()
+            if current_time < start_time or current_time > end_time:
+                if current_time > end_time:
+                    next_date = now.date() + datetime.timedelta(days=1)
+                else:
+                    next_date = now.date()
+                return datetime.datetime.combine(next_date, start_time)
+
+            start_datetime = datetime.datetime.combine(now.date(), start_time)
+            minutes_since_start = (now - start_datetime).total_seconds() / 60
+
+            if minutes_since_start < 0:
+                return start_datetime
+
+            next_interval = ((int(minutes_since_start) // interval) + 1) * interval
+            next_reminder = start_datetime + datetime.timedelta(minutes=next_interval)
+
+            end_datetime = datetime.datetime.combine(now.date(), end_time)
+            if next_reminder > end_datetime:
+                tomorrow = now.date() + datetime.timedelta(days=1)
+                return datetime.datetime.combine(tomorrow, start_time)
+
+            return next_reminder
+        except:
+            return None
+
+    def calculate_daily_reminders(self):
+        try:
+            start_time = datetime.datetime.strptime(self.settings["start_time"], "%H:%M")
+            end_time = datetime.datetime.strptime(self.settings["end_time"], "%H:%M")
+            interval = self.settings["reminder_interval_min"]
+
+            total_minutes = (end_time - start_time).total_seconds() / 60
+            return int(total_minutes / interval) + 1
+        except:
+            return 1
+
+    def should_show_reminder(self, now):
+        try:
+            start_time = datetime.datetime.strptime(self.settings["start_time"], "%H:%M").time()
+            end_time = datetime.datetime.strptime(self.settings["end_time"], "%H:%M").time()
+            current_time = now.time()
+
+            if current_time < start_time or current_time > end_time:
+                return False
+
+            start_datetime = datetime.datetime.combine(now.date(), start_time)
+            minutes_since_start = (now - start_datetime).total_seconds() / 60
+
+            if minutes_since_start < 0:
+                return False
+
+            interval = self.settings["reminder_interval_min"]
+            return minutes_since_start % interval < 0.5
+
+        except:
+            return False
+
+    def simulate_day(self, day):
+        # The old reminder_loop body, stepped every POLL_SECONDS over one day;
+        # returns (wakeups, fired)
+        triggered_times = set()
+        now = datetime.datetime.combine(day, datetime.time())
+        end = now + datetime.timedelta(days=1)
+        step = datetime.timedelta(seconds=POLL_SECONDS)
+        wakeups = fired = 0
+        while now < end:
+            if self.should_show_reminder(now):
+                current_minute = now.hour * 60 + now.minute
+                if current_minute not in triggered_times:
+                    triggered_times.add(current_minute)
+                    fired += 1
+            wakeups += 1
+            now += step
+        return wakeups, fired
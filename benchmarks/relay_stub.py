@@ -0,0 +1,98 @@
+"""Stand-in for the local webhook relay, for trying out --webhook.
+
+Accepts POSTed reminder batches over kept-alive HTTP/1.1 connections and
+counts them. --delay makes it slow and --fail-every makes it answer 503 to
+every Nth request, to exercise the notifier's timeouts and retries.
+
+    python benchmarks/relay_stub.py --port 8787
+    python hydrator.py --headless --webhook http://127.0.0.1:8787/reminders
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubRelay:
+    def __init__(self, port=0, delay=0.0, fail_every=0, verbose=False):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.batches = 0
+        self.reminders = 0
+        relay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with relay.lock:
+                    relay.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if relay.delay:
+                    time.sleep(relay.delay)
+                with relay.lock:
+                    relay.requests += 1
+                    failed = relay.fail_every and relay.requests % relay.fail_every == 0
+                if failed:
+                    self.reply(503, b"try again")
+                    return
+                reminders = json.loads(body)["reminders"]
+                with relay.lock:
+                    relay.batches += 1
+                    relay.reminders += len(reminders)
+                if relay.verbose:
+                    for reminder in reminders:
+                        print(json.dumps(reminder), flush=True)
+                self.reply(200, b"ok")
+
+            def reply(self, status, body):
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        # Clients that timed out and hung up are expected here, not errors
+        self.server.handle_error = lambda request, address: None
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/reminders"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--delay", type=float, default=0.0, metavar="SECONDS",
+                        help="sleep this long before answering each request")
+    parser.add_argument("--fail-every", type=int, default=0, metavar="N",
+                        help="answer every Nth request with 503")
+    args = parser.parse_args(argv)
+    relay = StubRelay(args.port, args.delay, args.fail_every, verbose=True)
+    print(f"Relay listening on {relay.url}", flush=True)
+    try:
+        relay.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        relay.server.server_close()
+
+if __name__ == "__main__":
+    main()
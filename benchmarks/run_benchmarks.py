@@ -0,0 +1,112 @@
+"""Run the benchmark suite and write one JSON document.
+
+Each benchmark runs in its own interpreter. Pass --baseline with a previous
+output file to flag metrics that got worse by more than --threshold.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline results.json
+    python benchmarks/run_benchmarks.py --all      # include the fleet-scale ones
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (script, arguments)
+SUITE = {
+    "schedule": ("bench_schedule.py", []),
+    "loop": ("bench_loop.py", ["--days", "7"]),
+    "startup": ("bench_startup.py", ["--runs", "5"]),
+    "popup": ("bench_popup.py", ["--reminders", "50"]),
+    "notifiers": ("bench_notifiers.py", ["--profiles", "1000", "--ticks", "20"]),
+}
+HEAVY = {
+    "fleet": ("bench_fleet.py", ["--profiles", "100000"]),
+    "profile_memory": ("bench_profile_memory.py", ["--profiles", "1000000"]),
+    "analytics": ("bench_analytics.py", ["--events", "10000000"]),
+    "supervisor": ("bench_supervisor.py", ["--profiles", "20000"]),
+}
+
+# Metric names containing these are "lower is better"
+COST_MARKERS = ("_ns", "_us", "_ms", "seconds", "rss", "wakeups", "latency", "bytes")
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_one(script, arguments):
+    completed = subprocess.run([sys.executable, os.path.join(HERE, script), *arguments],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:] or ["failed"]}
+    return json.loads(completed.stdout)
+
+def flatten(value, prefix=""):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, value
+
+def regressions(current, baseline, threshold):
+    old = dict(flatten(baseline["results"]))
+    found = []
+    for name, value in flatten(current["results"]):
+        if name not in old or not old[name]:
+            continue
+        if not any(marker in name for marker in COST_MARKERS) or "legacy" in name:
+            continue
+        change = (value - old[name]) / abs(old[name])
+        if change > threshold:
+            found.append({"metric": name, "baseline": old[name], "current": value,
+                          "change": round(change, 3)})
+    return found
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write results here instead of stdout")
+    parser.add_argument("--baseline", help="previous results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: %(default)s)")
+    parser.add_argument("--all", action="store_true", help="also run the fleet-scale benchmarks")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="run just these benchmarks")
+    args = parser.parse_args(argv)
+
+    suite = {**SUITE, **(HEAVY if args.all else {})}
+    if args.only:
+        suite = {name: entry for name, entry in {**SUITE, **HEAVY}.items() if name in args.only}
+
+    document = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {name: run_one(script, arguments) for name, (script, arguments) in suite.items()},
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            document["regressions"] = regressions(document, json.load(f), args.threshold)
+        status = 1 if document["regressions"] else 0
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import datetime
+import random
+
+class SystemClock:
+    # Real time. wait() is Event.wait, which times out on the monotonic clock
+    def now(self):
+        return datetime.datetime.now()
+
+    def wait(self, event, timeout=None):
+        return event.wait(timeout)
+
+class VirtualClock:
+    # Simulated time for running schedules faster than real time. wait()
+    # never blocks: it jumps the clock forward by the timeout (plus optional
+    # random oversleep, to model a delayed thread) and returns whether the
+    # event was set. Once stop_at is reached on_stop() is called and wait()
+    # returns True, so loops re-check their running flag and exit.
+    def __init__(self, start, stop_at=None, on_stop=None, jitter=0.0, seed=None):
+        self.current = start
+        self.stop_at = stop_at
+        self.on_stop = on_stop
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.waits = 0
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        self.current += datetime.timedelta(seconds=seconds)
+
+    def wait(self, event, timeout=None):
+        self.waits += 1
+        if event.is_set():
+            return True
+        if timeout is None:
+            if self.stop_at is None:
+                raise RuntimeError("Waiting without a timeout would never return in virtual time")
+            target = self.stop_at
+        else:
+            if self.jitter:
+                timeout += self.random.uniform(0, self.jitter)
+            target = self.current + datetime.timedelta(seconds=timeout)
+        if self.stop_at is not None and target >= self.stop_at:
+            self.current = self.stop_at
+            if self.on_stop:
+                self.on_stop()
+            return True
+        self.current = target
+        return event.is_set()
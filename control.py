@@ -0,0 +1,281 @@
+import json
+import os
+import socket
+import stat
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Windows builds without AF_UNIX listen on loopback TCP instead and keep the
+# port number in the socket path
+HAS_UNIX_SOCKETS = hasattr(socket, "AF_UNIX")
+
+CONNECT_TIMEOUT = 2.0
+# A second launch can race the first one binding its socket
+CONNECT_RETRIES = 10
+RETRY_SECONDS = 0.1
+
+COMMANDS = ("status", "snooze", "ack", "reload", "pause", "resume", "show", "quit")
+# The ones that change what the status display shows
+STATE_COMMANDS = ("snooze", "ack", "reload", "pause", "resume")
+
+def runtime_dir():
+    # $XDG_RUNTIME_DIR, else our own directory under the temp directory.
+    # Names in a shared /tmp are guessable, so another user could plant the
+    # lock or socket there; the fallback must be a 0700 directory we own.
+    directory = os.environ.get("XDG_RUNTIME_DIR")
+    if directory:
+        return directory
+    import tempfile
+    owner = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "user")
+    directory = os.path.join(tempfile.gettempdir(), f"hydrator-{owner}")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    if hasattr(os, "getuid"):
+        info = os.lstat(directory)
+        if (not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid()
+                or info.st_mode & 0o077):
+            raise OSError(f"{directory} is not a private directory owned by you; "
+                          "remove it or set XDG_RUNTIME_DIR")
+    return directory
+
+def instance_paths(instance="default"):
+    # (lock file, control socket) for one named instance of the current user.
+    # Raises OSError if there is no safe place for them.
+    base = os.path.join(runtime_dir(), f"hydrator-{instance}")
+    return base + ".lock", base + ".sock"
+
+class InstanceLock:
+    # An OS file lock held for the life of the process; it is released by the
+    # kernel if we crash, so a stale lock file never blocks the next launch
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self):
+        # False if another process holds the lock; OSError if the lock file
+        # can't be opened at all
+        f = None
+        try:
+            f = open(self.path, "a+")
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError as e:
+            if f is None:
+                raise OSError(f"Cannot open the instance lock {self.path}: {e}")
+            f.close()
+            return False
+        self.file = f
+        return True
+
+    def release(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+class ControlServer:
+    # One-line text commands in, one JSON line out, served from a daemon
+    # thread. handle(line) returns the reply dict.
+    def __init__(self, path, handle):
+        self.path = path
+        self.handle = handle
+        self.sock = None
+        # Held while a command is answered so close() lets the reply go out
+        self.busy = threading.Lock()
+
+    def start(self):
+        if HAS_UNIX_SOCKETS:
+            # Only the lock holder gets here, so an existing socket is stale
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.bind(self.path)
+            os.chmod(self.path, 0o600)
+        else:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("127.0.0.1", 0))
+            with open(self.path, "w") as f:
+                f.write(str(sock.getsockname()[1]))
+        sock.listen(8)
+        self.sock = sock
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        # close() clears self.sock under us; the closed socket ends the loop
+        sock = self.sock
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            with conn, self.busy:
+                try:
+                    conn.settimeout(CONNECT_TIMEOUT)
+                    reply = self.handle(read_line(conn))
+                except Exception as e:
+                    reply = {"ok": False, "error": str(e)}
+                try:
+                    conn.sendall((json.dumps(reply) + "\n").encode())
+                except OSError:
+                    pass
+
+    def close(self):
+        if self.sock is None:
+            return
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        self.sock = None
+        with self.busy:
+            pass
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+def read_line(conn):
+    data = b""
+    while b"\n" not in data:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return data.decode().strip()
+
+def connect(path):
+    if HAS_UNIX_SOCKETS:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = path
+    else:
+        with open(path) as f:
+            address = ("127.0.0.1", int(f.read()))
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(address)
+    except:
+        sock.close()
+        raise
+    return sock
+
+def send(path, line):
+    # Reply dict from the running instance; OSError if there isn't one
+    for attempt in range(CONNECT_RETRIES):
+        try:
+            sock = connect(path)
+            break
+        except (OSError, ValueError):
+            if attempt == CONNECT_RETRIES - 1:
+                raise OSError(f"No running Hydrator instance at {path}")
+            time.sleep(RETRY_SECONDS)
+    with sock:
+        sock.sendall((line + "\n").encode())
+        reply = read_line(sock)
+    if not reply:
+        raise OSError("The running instance closed the connection")
+    return json.loads(reply)
+
+class Controller:
+    # Maps control commands onto a ReminderEngine. Commands arrive on the
+    # server thread; the GUI points the on_* hooks at handlers that hop to
+    # the Tk thread.
+    def __init__(self, engine):
+        self.engine = engine
+        self.on_ack = None
+        self.on_show = None
+        self.on_change = None
+        self.on_quit = None
+
+    def handle(self, line):
+        words = line.split()
+        if not words or words[0] not in COMMANDS:
+            return {"ok": False, "error": f"unknown command {line!r}; expected one of {', '.join(COMMANDS)}"}
+        reply = getattr(self, words[0])(*words[1:])
+        if words[0] in STATE_COMMANDS and self.on_change:
+            self.on_change()
+        return {"ok": True, **reply}
+
+    def status(self):
+        engine = self.engine
+        now = engine.clock.now()
+        next_time = engine.get_next_reminder_time(now)
+        snoozed_until = engine.snoozed_until
+        totals = engine.today_totals()
+        return {
+            "running": engine.running,
+            "paused": engine.paused,
+            "snoozed_until": snoozed_until.isoformat(timespec="seconds")
+                             if snoozed_until and snoozed_until > now else None,
+            "next_reminder": next_time.isoformat(timespec="seconds") if next_time else None,
+            "remaining_today": engine.count_remaining(now),
+            "consumed_ml": totals.consumed_ml,
+            "daily_goal_ml": engine.settings["daily_goal_ml"],
+        }
+
+    def snooze(self, minutes="15"):
+        minutes = int(minutes)
+        if minutes <= 0:
+            raise ValueError("snooze takes a positive number of minutes")
+        until = self.engine.snooze(minutes)
+        return {"snoozed_until": until.isoformat(timespec="seconds")}
+
+    def ack(self):
+        if self.on_ack:
+            self.on_ack()
+        else:
+            from history import ACKNOWLEDGED
+            self.engine.record(ACKNOWLEDGED, self.engine.settings["water_per_reminder"])
+        return {}
+
+    def reload(self):
+        return {"changed": self.engine.refresh_settings()}
+
+    def pause(self):
+        self.engine.pause()
+        return {}
+
+    def resume(self):
+        self.engine.resume()
+        return {}
+
+    def show(self):
+        if self.on_show:
+            self.on_show()
+        return {"window": self.on_show is not None}
+
+    def quit(self):
+        if self.on_quit:
+            self.on_quit()
+        else:
+            self.engine.stop()
+        return {}
+
+class FleetController(Controller):
+    # --profiles daemons only report status and quit; the rest is per-user state
+    def handle(self, line):
+        words = line.split()
+        if words and words[0] in ("status", "show", "quit"):
+            return super().handle(line)
+        return {"ok": False, "error": "only status and quit are supported with --profiles"}
+
+    def status(self):
+        fleet = self.engine
+        key = fleet.next_due()
+        next_time = None
+        if key is not None:
+            from fleet import key_to_datetime
+            next_time = key_to_datetime(key).isoformat(timespec="seconds")
+        return {"running": fleet.running, "profiles": len(fleet.profiles), "next_reminder": next_time}
@@ -0,0 +1,398 @@
+import datetime
+import threading
+import time
+from array import array
+from collections import deque
+from bisect import bisect_left
+
+from clock import SystemClock
+from history import HistoryLog, FIRED
+
+SETTINGS_FILE = "water_settings.json"
+
+DEFAULT_SETTINGS = {
+    "daily_goal_ml": 2000,
+    "reminder_interval_min": 30,
+    "start_time": "08:00",
+    "end_time": "18:00",
+    "water_per_reminder": 250,
+    "sound_enabled": True,
+    "custom_message": "Time to drink water!",
+    "custom_times": []
+}
+
+# Upper bound on a single scheduler sleep, so wall-clock changes are noticed
+MAX_SLEEP_SECONDS = 3600
+
+def parse_hhmm(value):
+    # "HH:MM" -> minutes since midnight
+    hours, sep, minutes = value.strip().partition(":")
+    if not sep or len(minutes) != 2:
+        raise ValueError(f"Invalid time: {value!r}")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(f"Invalid time: {value!r}")
+    return hours * 60 + minutes
+
+class DailySchedule:
+    # Reminder slots for one day, compiled once per settings change into a
+    # sorted array of minute offsets so every time query is a bisect.
+    def __init__(self, start_time, end_time, interval, custom_times=()):
+        start = parse_hhmm(start_time)
+        end = parse_hhmm(end_time)
+        interval = int(interval)
+        if interval <= 0:
+            raise ValueError("Reminder interval must be positive")
+        self.interval = interval
+
+        slots = set(range(start, end + 1, interval))
+        slots.update(parse_hhmm(t) for t in custom_times)
+        self.offsets = array('H', sorted(slots))
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings["start_time"], settings["end_time"],
+                   settings["reminder_interval_min"], settings.get("custom_times", ()))
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _ceil_minute(self, now):
+        minute = now.hour * 60 + now.minute
+        if now.second or now.microsecond:
+            minute += 1
+        return minute
+
+    def next_reminder(self, now):
+        # First slot at or after now, rolling over to tomorrow
+        if not self.offsets:
+            return None
+        index = bisect_left(self.offsets, self._ceil_minute(now))
+        day = datetime.datetime.combine(now.date(), datetime.time())
+        if index == len(self.offsets):
+            day += datetime.timedelta(days=1)
+            index = 0
+        return day + datetime.timedelta(minutes=self.offsets[index])
+
+    def is_due(self, now):
+        minute = now.hour * 60 + now.minute
+        index = bisect_left(self.offsets, minute)
+        return index < len(self.offsets) and self.offsets[index] == minute
+
+    def count_remaining(self, now):
+        return len(self.offsets) - bisect_left(self.offsets, self._ceil_minute(now))
+
+class DayBitmap:
+    # One bit per minute of the day (1440 bits, 180 bytes) recording which
+    # reminder slots have fired; the completed count is a popcount.
+    __slots__ = ("bits",)
+
+    def __init__(self):
+        self.bits = bytearray(180)
+
+    def add(self, minute):
+        # Returns True if the minute wasn't already set
+        byte, mask = minute >> 3, 1 << (minute & 7)
+        if self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        return True
+
+    def __contains__(self, minute):
+        return bool(self.bits[minute >> 3] & (1 << (minute & 7)))
+
+    def __len__(self):
+        return bin(int.from_bytes(self.bits, "little")).count("1")
+
+    def clear(self):
+        self.bits[:] = bytes(180)
+
+class ConsoleNotifier:
+    def notify(self, message, amount):
+        now = datetime.datetime.now().strftime("%H:%M")
+        print(f"[{now}] 💧 {message} Drink {amount} mL of water NOW!", flush=True)
+
+class LogNotifier:
+    def __init__(self, logger=None):
+        if logger is None:
+            # logging is slow to import and only --log needs it
+            import logging
+            logger = logging.getLogger("hydrator")
+        self.logger = logger
+
+    def notify(self, message, amount):
+        self.logger.info("%s Drink %d mL of water NOW!", message, amount)
+
+class ReminderChannel:
+    # Bounded hand-off from the scheduler thread to a consumer thread (the Tk
+    # main loop). put() never blocks: once the queue is full new reminders are
+    # merged into the newest entry, and drain() coalesces everything pending
+    # into one reminder with the summed amount.
+    def __init__(self, maxlen=16, on_ready=None):
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.maxlen = maxlen
+        self.on_ready = on_ready
+        self.coalesced = 0
+        self.settings_changed = False
+        # Functions to run on the consumer thread (control commands)
+        self.calls = deque()
+        # perf_counter() when the oldest pending reminder was queued, and the
+        # same for the batch most recently drained
+        self.pending_since = None
+        self.drained_since = None
+
+    def notify(self, message, amount):
+        self.put(message, amount)
+
+    def put(self, message, amount):
+        with self.lock:
+            was_empty = self.idle()
+            if not self.pending:
+                self.pending_since = time.perf_counter()
+            if len(self.pending) >= self.maxlen:
+                _, total, count = self.pending[-1]
+                self.pending[-1] = (message, total + amount, count + 1)
+                self.coalesced += 1
+            else:
+                self.pending.append((message, amount, 1))
+        # Only the empty -> non-empty transition needs to wake the consumer
+        if was_empty and self.on_ready:
+            self.on_ready()
+
+    def mark_settings_changed(self):
+        with self.lock:
+            was_idle = self.idle()
+            self.settings_changed = True
+        if was_idle and self.on_ready:
+            self.on_ready()
+
+    def call(self, function):
+        with self.lock:
+            was_idle = self.idle()
+            self.calls.append(function)
+        if was_idle and self.on_ready:
+            self.on_ready()
+
+    def take_calls(self):
+        with self.lock:
+            calls = list(self.calls)
+            self.calls.clear()
+        return calls
+
+    def idle(self):
+        # Caller holds the lock
+        return not self.pending and not self.settings_changed and not self.calls
+
+    def take_settings_changed(self):
+        with self.lock:
+            changed = self.settings_changed
+            self.settings_changed = False
+        return changed
+
+    def drain(self):
+        # (message, total amount, reminder count) or None if nothing is pending
+        with self.lock:
+            if not self.pending:
+                return None
+            items = list(self.pending)
+            self.pending.clear()
+            self.drained_since = self.pending_since
+        message = items[-1][0]
+        return message, sum(item[1] for item in items), sum(item[2] for item in items)
+
+class ReminderEngine:
+    # GUI-free scheduling core: owns settings, the compiled schedule and the
+    # reminder thread, and hands due reminders to a notifier.
+    def __init__(self, notifier=None, settings_path=SETTINGS_FILE, store=None, history=None,
+                 clock=None, metrics=None):
+        self.notifier = notifier or ConsoleNotifier()
+        self.clock = clock or SystemClock()
+        # Optional metrics.Metrics; None keeps the hot path free of it
+        self.metrics = metrics
+        if store is None:
+            from settings_store import SettingsStore
+            store = SettingsStore(settings_path)
+        self.store = store
+        if history is None:
+            history = HistoryLog()
+        self.history = history
+        self.settings, self.schedule = store.load()
+        # Called on the watcher thread after a hot reload
+        self.on_settings_changed = None
+        self.reminder_thread = None
+        self.running = False
+        # Paused: no reminders until resumed. Snoozed: none before that time.
+        self.paused = False
+        self.snoozed_until = None
+        self.wake_event = threading.Event()
+        # Guards triggered_times, which the GUI thread reads for progress
+        self.state_lock = threading.Lock()
+        self.triggered_times = DayBitmap()
+
+    def apply_settings(self, settings, schedule=None):
+        # Raises ValueError if the new settings don't compile
+        if schedule is None:
+            schedule = DailySchedule.from_settings(settings)
+        self.settings = settings
+        self.schedule = schedule
+        self.wake_event.set()
+
+    def save_settings(self):
+        # Only touches the disk when something changed
+        return self.store.save(self.settings)
+
+    def watch_settings(self):
+        # Hot-apply edits to the settings file without a restart
+        self.store.watch(self.reload_settings)
+
+    def reload_settings(self, settings, schedule):
+        self.apply_settings(settings, schedule)
+        if self.on_settings_changed:
+            self.on_settings_changed()
+
+    def refresh_settings(self):
+        # Re-read the settings file now instead of waiting for the watcher
+        result = self.store.reload()
+        if result:
+            self.reload_settings(*result)
+        return bool(result)
+
+    def pause(self):
+        self.paused = True
+        self.wake_event.set()
+
+    def resume(self):
+        self.paused = False
+        self.snoozed_until = None
+        self.wake_event.set()
+
+    def snooze(self, minutes):
+        self.snoozed_until = self.clock.now() + datetime.timedelta(minutes=minutes)
+        self.wake_event.set()
+        return self.snoozed_until
+
+    def start(self):
+        # Let a previous loop observe the stop before reusing the event
+        if self.reminder_thread and self.reminder_thread.is_alive():
+            self.reminder_thread.join(1)
+        self.running = True
+        self.wake_event.clear()
+        with self.state_lock:
+            self.triggered_times.clear()
+        self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
+        self.reminder_thread.start()
+
+    def run(self):
+        # Blocking variant of start() for the headless daemon
+        self.running = True
+        self.wake_event.clear()
+        with self.state_lock:
+            self.triggered_times.clear()
+        self.reminder_loop()
+
+    def stop(self):
+        self.running = False
+        self.wake_event.set()
+
+    def close(self):
+        self.stop()
+        self.store.stop()
+        self.history.close()
+        if self.metrics:
+            self.metrics.close()
+
+    def fire(self, amount=None):
+        if amount is None:
+            amount = self.settings["water_per_reminder"]
+        self.record(FIRED, amount)
+        if self.metrics:
+            self.metrics.reminders_fired.inc()
+        self.notifier.notify(self.settings["custom_message"], amount)
+
+    def record(self, kind, amount):
+        # Append a reminder event (see history.KINDS) to the intake log
+        self.history.append(kind, amount, self.settings["reminder_interval_min"],
+                            now=self.clock.now())
+
+    def today_totals(self):
+        return self.history.today(self.clock.now().date())
+
+    def get_next_reminder_time(self, now=None):
+        if self.schedule is None or self.paused:
+            return None
+        if now is None:
+            now = self.clock.now()
+        snoozed_until = self.snoozed_until
+        if snoozed_until and snoozed_until > now:
+            now = snoozed_until
+        return self.schedule.next_reminder(now)
+
+    def should_show_reminder(self, now):
+        if self.schedule is None:
+            return False
+        return self.schedule.is_due(now)
+
+    def calculate_daily_reminders(self):
+        if self.schedule is None:
+            return 1
+        return len(self.schedule)
+
+    def count_remaining(self, now):
+        if self.schedule is None:
+            return 0
+        return self.schedule.count_remaining(now)
+
+    def completed_today(self):
+        with self.state_lock:
+            return len(self.triggered_times)
+
+    def reminder_loop(self):
+        last_date = None
+        search_from = None
+        metrics = self.metrics
+
+        while self.running:
+            if metrics:
+                metrics.loop_iterations.inc()
+            try:
+                now = self.clock.now()
+                due = self.get_next_reminder_time(max(search_from, now) if search_from else now)
+                if due is None:
+                    # Paused or invalid settings: park until woken
+                    self.clock.wait(self.wake_event)
+                    self.wake_event.clear()
+                    continue
+
+                # Sleep until the deadline, waking early only on stop or settings
+                # change. Event.wait times out on the monotonic clock; long waits
+                # are capped so wall-clock jumps (suspend, DST) get resynchronised.
+                delay = (due - now).total_seconds()
+                if delay > 0:
+                    if self.clock.wait(self.wake_event, min(delay, MAX_SLEEP_SECONDS)):
+                        self.wake_event.clear()
+                        search_from = None
+                        continue
+                    now = self.clock.now()
+                    if now < due:
+                        continue
+
+                due_minute = due.hour * 60 + due.minute
+                with self.state_lock:
+                    # Reset daily tracking
+                    if last_date != now.date():
+                        self.triggered_times.clear()
+                        last_date = now.date()
+                    fire = due.date() == now.date() and self.triggered_times.add(due_minute)
+                if fire:
+                    if metrics:
+                        metrics.reminder_drift.observe((now - due).total_seconds())
+                    self.fire()
+                search_from = due + datetime.timedelta(seconds=1)
+
+            except Exception as e:
+                print(f"Reminder loop error: {e}")
+                if metrics:
+                    metrics.loop_errors.inc()
+                if self.clock.wait(self.wake_event, 60):
+                    self.wake_event.clear()
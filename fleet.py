@@ -0,0 +1,218 @@
+import datetime
+import heapq
+import json
+import sys
+import threading
+from bisect import bisect_right
+
+from clock import SystemClock
+from engine import DailySchedule, DayBitmap, MAX_SLEEP_SECONDS
+from history import FIRED
+from settings_store import normalize
+
+# Heap keys are absolute minutes: date ordinal * 1440 + minute of day
+
+def minute_key(moment):
+    return moment.toordinal() * 1440 + moment.hour * 60 + moment.minute
+
+def key_to_datetime(key):
+    day, minute = divmod(key, 1440)
+    return (datetime.datetime.fromordinal(day)
+            + datetime.timedelta(minutes=minute))
+
+class Profile:
+    # Fixed-layout record: the timing lives in the (shared) compiled schedule
+    # and fired slots in a day bitmap, so no per-profile dict or set.
+    __slots__ = ("id", "schedule", "water_per_reminder", "daily_goal_ml",
+                 "custom_message", "triggered_times", "day", "generation")
+
+    def __init__(self, profile_id, settings, schedule):
+        self.id = profile_id
+        self.schedule = schedule
+        self.water_per_reminder = int(settings["water_per_reminder"])
+        self.daily_goal_ml = int(settings["daily_goal_ml"])
+        self.custom_message = sys.intern(settings["custom_message"])
+        self.triggered_times = DayBitmap()
+        self.day = None
+        # Bumped on update/removal so stale heap entries can be skipped
+        self.generation = 0
+
+    def completed_today(self):
+        return len(self.triggered_times)
+
+    def next_key(self, key):
+        # First slot strictly after key, rolling over to the next day
+        offsets = self.schedule.offsets
+        day, minute = divmod(key, 1440)
+        index = bisect_right(offsets, minute)
+        if index < len(offsets):
+            return day * 1440 + offsets[index]
+        return (day + 1) * 1440 + offsets[0]
+
+class FleetScheduler:
+    # Many independent profiles in one process. Each profile has exactly one
+    # entry in a min-heap keyed by its next due minute, so a tick only touches
+    # the reminders that are due, not every profile.
+    def __init__(self, dispatch, history=None, clock=None, metrics=None, dispatch_batch=None):
+        # dispatch(profile, key) per reminder, or dispatch_batch([(profile,
+        # key), ...]) once per tick with everything that came due
+        self.dispatch = dispatch
+        self.dispatch_batch = dispatch_batch
+        self.history = history
+        self.clock = clock or SystemClock()
+        self.metrics = metrics
+        self.profiles = {}
+        self.heap = []
+        self.schedules = {}
+        self.lock = threading.Lock()
+        self.running = False
+        self.wake_event = threading.Event()
+        self.reminder_thread = None
+
+    def compile_schedule(self, settings):
+        # Profiles with identical timing share one compiled schedule
+        key = (settings["start_time"], settings["end_time"],
+               settings["reminder_interval_min"], tuple(settings.get("custom_times", ())))
+        schedule = self.schedules.get(key)
+        if schedule is None:
+            schedule = self.schedules[key] = DailySchedule.from_settings(settings)
+        return schedule
+
+    def add_profile(self, profile_id, settings, now=None):
+        # Raises ValueError if the settings don't compile
+        settings = normalize(settings)
+        schedule = self.compile_schedule(settings)
+        with self.lock:
+            old = self.profiles.get(profile_id)
+            profile = Profile(profile_id, settings, schedule)
+            if old is not None:
+                profile.generation = old.generation + 1
+                profile.triggered_times = old.triggered_times
+                profile.day = old.day
+            self.profiles[profile_id] = profile
+            if schedule.offsets:
+                key = minute_key(now or self.clock.now())
+                self._push(profile, profile.next_key(key - 1))
+        self.wake_event.set()
+        return profile
+
+    def remove_profile(self, profile_id):
+        with self.lock:
+            profile = self.profiles.pop(profile_id, None)
+            if profile is not None:
+                profile.generation += 1
+
+    def _push(self, profile, key):
+        heapq.heappush(self.heap, (key, profile.id, profile.generation))
+
+    def next_due(self):
+        with self.lock:
+            self._drop_stale()
+            return self.heap[0][0] if self.heap else None
+
+    def _drop_stale(self):
+        heap = self.heap
+        profiles = self.profiles
+        while heap:
+            key, profile_id, generation = heap[0]
+            profile = profiles.get(profile_id)
+            if profile is not None and profile.generation == generation:
+                return
+            heapq.heappop(heap)
+
+    def tick(self, now_key):
+        # Fire every reminder due at or before now_key; returns how many fired
+        heap = self.heap
+        profiles = self.profiles
+        with self.lock:
+            due = []
+            while heap and heap[0][0] <= now_key:
+                key, profile_id, generation = heapq.heappop(heap)
+                profile = profiles.get(profile_id)
+                if profile is None or profile.generation != generation:
+                    continue
+                # Reschedule from now so a late tick never replays a backlog
+                heapq.heappush(heap, (profile.next_key(max(key, now_key)),
+                                      profile_id, generation))
+                day, minute = divmod(key, 1440)
+                if profile.day != day:
+                    profile.triggered_times.clear()
+                    profile.day = day
+                if profile.triggered_times.add(minute):
+                    due.append((profile, key))
+        history = self.history
+        metrics = self.metrics
+        if metrics and due:
+            metrics.reminders_fired.inc(amount=len(due))
+            now = self.clock.now()
+            for profile, key in due:
+                metrics.reminder_drift.observe((now - key_to_datetime(key)).total_seconds())
+        dispatch = self.dispatch
+        for profile, key in due:
+            if history:
+                history.append(FIRED, profile.water_per_reminder, profile.schedule.interval,
+                               profile.id, key_to_datetime(key))
+            if dispatch:
+                dispatch(profile, key)
+        if due and self.dispatch_batch:
+            self.dispatch_batch(due)
+        return len(due)
+
+    def start(self):
+        if self.reminder_thread and self.reminder_thread.is_alive():
+            self.reminder_thread.join(1)
+        self.running = True
+        self.wake_event.clear()
+        self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
+        self.reminder_thread.start()
+
+    def run(self):
+        self.running = True
+        self.wake_event.clear()
+        self.reminder_loop()
+
+    def stop(self):
+        self.running = False
+        self.wake_event.set()
+
+    def close(self):
+        self.stop()
+        if self.history:
+            self.history.close()
+        if self.metrics:
+            self.metrics.close()
+
+    def reminder_loop(self):
+        metrics = self.metrics
+        while self.running:
+            if metrics:
+                metrics.loop_iterations.inc()
+            try:
+                self.tick(minute_key(self.clock.now()))
+
+                # Sleep until the earliest due minute; adding profiles wakes us
+                key = self.next_due()
+                timeout = MAX_SLEEP_SECONDS
+                if key is not None:
+                    delay = (key_to_datetime(key) - self.clock.now()).total_seconds()
+                    timeout = min(max(delay, 0), MAX_SLEEP_SECONDS)
+                if self.clock.wait(self.wake_event, timeout):
+                    self.wake_event.clear()
+            except Exception as e:
+                print(f"Fleet loop error: {e}")
+                if metrics:
+                    metrics.loop_errors.inc()
+                if self.clock.wait(self.wake_event, 60):
+                    self.wake_event.clear()
+
+def load_profiles(path):
+    # Either a list of settings dicts with an "id", or {"profiles": [...]}
+    with open(path, "r") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data["profiles"]
+    profiles = {}
+    for index, entry in enumerate(data):
+        entry = dict(entry)
+        profiles[str(entry.pop("id", index))] = entry
+    return profiles
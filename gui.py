@@ -0,0 +1,633 @@
+import os
+import threading
+import time
+import tkinter as tk
+from collections import deque
+
+from engine import ReminderEngine, ReminderChannel
+from settings_store import validate
+from history import ACKNOWLEDGED, TIMED_OUT, DISMISSED
+from metrics import LAG_SAMPLE_MS
+
+# Fallback drain interval for a Tcl that can neither watch a pipe nor take
+# calls from other threads; Windows builds are threaded and don't need it
+DRAIN_POLL_MS = 500
+
+# Popup geometry and how long it stays up without an answer
+POPUP_WIDTH = 400
+POPUP_HEIGHT = 200
+POPUP_TIMEOUT_MS = 30000
+
+# Popup close kinds as metric labels
+POPUP_EVENTS = {ACKNOWLEDGED: "ack", TIMED_OUT: "timeout", DISMISSED: "dismiss"}
+
+class ReminderPopup:
+    # The hydration alert window, built once and then only shown/hidden.
+    # At most one alert is visible; a new reminder just updates its labels
+    # and adds to the amount. on_close(kind, amount, count) reports how it
+    # ended, for the real reminders it stood for (test popups aren't counted).
+    def __init__(self, root, on_close=None, metrics=None):
+        self.root = root
+        self.on_close = on_close
+        self.metrics = metrics
+        self.window = None
+        self.visible = False
+        self.amount = 0
+        self.count = 0
+        # The part of amount/count that came from real reminders
+        self.logged_amount = 0
+        self.logged_count = 0
+        self.timeout_id = None
+        self.requested_at = None
+        # perf_counter() of the reminder being shown firing, when known
+        self.fired_at = None
+        # Seconds from show() to the window being mapped
+        self.show_latencies = deque(maxlen=100)
+    
+    def build(self):
+        window = tk.Toplevel(self.root)
+        window.withdraw()
+        window.title("💧 HYDRATION ALERT 💧")
+        window.configure(bg='#e74c3c')
+        window.resizable(False, False)
+        window.attributes('-topmost', True)
+        window.protocol("WM_DELETE_WINDOW", lambda: self.hide(DISMISSED))
+        window.bind('<Map>', self.on_map)
+        
+        # Center once; the screen doesn't move between reminders
+        x = (window.winfo_screenwidth() // 2) - (POPUP_WIDTH // 2)
+        y = (window.winfo_screenheight() // 2) - (POPUP_HEIGHT // 2)
+        window.geometry(f"{POPUP_WIDTH}x{POPUP_HEIGHT}+{x}+{y}")
+        
+        # Error icon and message
+        main_frame = tk.Frame(window, bg='#e74c3c', padx=20, pady=20)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Big warning icon
+        icon_label = tk.Label(main_frame, text="⚠️", font=('Arial', 48), 
+                            bg='#e74c3c', fg='white')
+        icon_label.pack(pady=(0, 10))
+        
+        # Custom message
+        self.msg_label = tk.Label(main_frame, text="",
+                                font=('Arial', 14, 'bold'), bg='#e74c3c', fg='white',
+                                wraplength=350, justify=tk.CENTER)
+        self.msg_label.pack(pady=(0, 5))
+        
+        # Amount
+        self.amount_label = tk.Label(main_frame, text="",
+                                   font=('Arial', 12), bg='#e74c3c', fg='#ffff99',
+                                   wraplength=350, justify=tk.CENTER)
+        self.amount_label.pack(pady=(0, 15))
+        
+        # OK button
+        ok_btn = tk.Button(main_frame, text="✅ I'LL DRINK NOW", 
+                         command=lambda: self.hide(ACKNOWLEDGED),
+                         bg='white', fg='#e74c3c',
+                         font=('Arial', 12, 'bold'),
+                         relief=tk.RAISED, padx=20, pady=5)
+        ok_btn.pack()
+        
+        self.window = window
+    
+    def show(self, message, amount, count=1, fired_at=None, test=False):
+        self.requested_at = time.perf_counter()
+        self.fired_at = fired_at
+        if self.window is None:
+            self.build()
+        
+        if not self.visible:
+            self.amount = self.count = 0
+            self.logged_amount = self.logged_count = 0
+        self.amount += amount
+        self.count += count
+        if not test:
+            self.logged_amount += amount
+            self.logged_count += count
+        
+        amount_text = f"Drink {self.amount} mL of water NOW!"
+        if self.count > 1:
+            amount_text += f" ({self.count} reminders)"
+        if self.msg_label.cget('text') != message:
+            self.msg_label.config(text=message)
+        self.amount_label.config(text=amount_text)
+        
+        if self.visible:
+            # Already on screen: the labels were the only change
+            self.record_latency()
+            self.window.lift()
+        else:
+            self.visible = True
+            self.window.deiconify()
+            if self.metrics:
+                self.metrics.popups.inc("open")
+        
+        # Auto-close after 30 seconds, counted from the latest reminder
+        if self.timeout_id:
+            self.window.after_cancel(self.timeout_id)
+        self.timeout_id = self.window.after(POPUP_TIMEOUT_MS, lambda: self.hide(TIMED_OUT))
+        
+        # Make sound (system beep)
+        try:
+            self.window.bell()
+        except:
+            pass
+    
+    def hide(self, kind=DISMISSED):
+        if self.timeout_id:
+            self.window.after_cancel(self.timeout_id)
+            self.timeout_id = None
+        was_visible, self.visible = self.visible, False
+        self.window.withdraw()
+        if was_visible and self.metrics:
+            self.metrics.popups.inc(POPUP_EVENTS[kind])
+        if was_visible and self.on_close:
+            self.on_close(kind, self.logged_amount, self.logged_count)
+    
+    def on_map(self, event):
+        if event.widget is self.window:
+            self.record_latency()
+    
+    def record_latency(self):
+        if self.requested_at is not None:
+            now = time.perf_counter()
+            self.show_latencies.append(now - self.requested_at)
+            self.requested_at = None
+            if self.metrics and self.fired_at is not None:
+                self.metrics.display_latency.observe(now - self.fired_at)
+
+class WaterReminderGUI:
+    def __init__(self, engine=None, controller=None, background=False):
+        # background: start reminding with no window; the settings form is
+        # only built when the window is first opened (`hydrator` again)
+        self.root = tk.Tk()
+        self.background = background
+        self.form_built = False
+        self.setup_window()
+        self.engine = engine or ReminderEngine()
+        self.popup = ReminderPopup(self.root, on_close=self.on_popup_closed,
+                                   metrics=self.engine.metrics)
+        self.status_timer = None
+        self.setup_channel()
+        if controller:
+            # Control commands arrive on the server thread; run them on ours
+            controller.on_ack = lambda: self.channel.call(self.acknowledge)
+            controller.on_show = lambda: self.channel.call(self.raise_window)
+            controller.on_change = lambda: self.channel.call(self.update_status_display)
+            controller.on_quit = lambda: self.channel.call(self.on_closing)
+        if self.engine.metrics:
+            self.start_lag_sampling()
+        if background:
+            self.root.withdraw()
+            self.engine.start()
+        else:
+            self.build_form()
+        self.engine.watch_settings()
+    
+    def build_form(self):
+        self.setup_gui()
+        self.center_window()
+        self.form_built = True
+        if self.running:
+            self.start_btn.config(text="⏹️ Stop Reminders", bg='#e74c3c')
+            self.status_label.config(text="🔔 Reminders are active!")
+            self.update_status_display()
+        
+    def setup_window(self):
+        self.root.title("💧 Hydrator")
+        self.root.geometry("500x650")
+        self.root.resizable(False, False)
+        
+        # Set icon (creates a simple water drop icon)
+        try:
+            # Create icon data
+            icon_data = """
+            iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAAdgAAAHYBTnsmCAAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAIXSURBVFiFtZc9SwNBEIafRLBQsLGwsLa0sLW1tbW1tLGwsLCwsLGwsLW1tbW1tLGwsLCwsLGwsLW1tbW1tbGwsLCwsLGwsLW1tbW1tbGwsLCwsLGwsLW1tbW1tbGwsLCwsLGwsLW1tbW1tbGw==
+            """
+            self.root.iconbitmap(default='water_icon.ico')
+        except:
+            pass
+        
+        # Modern color scheme
+        self.bg_color = "#2c3e50"
+        self.accent_color = "#3498db"
+        self.text_color = "#ecf0f1"
+        self.button_color = "#34495e"
+        
+        self.root.configure(bg=self.bg_color)
+        
+    def center_window(self):
+        self.root.update_idletasks()
+        x = (self.root.winfo_screenwidth() // 2) - (500 // 2)
+        y = (self.root.winfo_screenheight() // 2) - (650 // 2)
+        self.root.geometry(f"500x650+{x}+{y}")
+    
+    @property
+    def settings(self):
+        return self.engine.settings
+    
+    @property
+    def running(self):
+        return self.engine.running
+    
+    def save_settings(self):
+        try:
+            self.engine.save_settings()
+        except Exception as e:
+            from tkinter import messagebox
+            messagebox.showerror("Error", f"Could not save settings: {str(e)}")
+    
+    def setup_gui(self):
+        # ttk is only needed for the settings form, not for reminders
+        from tkinter import ttk
+        
+        # Configure ttk styles
+        style = ttk.Style()
+        style.theme_use('clam')
+        
+        # Configure custom styles
+        style.configure('Title.TLabel', 
+                       background=self.bg_color, 
+                       foreground=self.accent_color,
+                       font=('Arial', 16, 'bold'))
+        
+        style.configure('Custom.TLabel',
+                       background=self.bg_color,
+                       foreground=self.text_color,
+                       font=('Arial', 10))
+        
+        style.configure('Custom.TButton',
+                       background=self.button_color,
+                       foreground=self.text_color,
+                       font=('Arial', 10, 'bold'),
+                       borderwidth=0)
+        
+        style.map('Custom.TButton',
+                 background=[('active', self.accent_color)])
+        
+        # Main container
+        main_frame = tk.Frame(self.root, bg=self.bg_color, padx=20, pady=20)
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Title
+        title_label = ttk.Label(main_frame, text="💧 Hydrator", style='Title.TLabel')
+        title_label.pack(pady=(0, 30))
+        
+        # Settings Frame
+        settings_frame = tk.LabelFrame(main_frame, text="⚙️ Settings", 
+                                     bg=self.bg_color, fg=self.text_color,
+                                     font=('Arial', 12, 'bold'), padx=15, pady=15)
+        settings_frame.pack(fill=tk.X, pady=(0, 20))
+        
+        # Daily Goal
+        goal_frame = tk.Frame(settings_frame, bg=self.bg_color)
+        goal_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(goal_frame, text="Daily Goal (ML):", style='Custom.TLabel').pack(side=tk.LEFT)
+        self.goal_var = tk.StringVar(value=str(self.settings["daily_goal_ml"]))
+        goal_entry = tk.Entry(goal_frame, textvariable=self.goal_var, width=10, 
+                             font=('Arial', 10), justify='center')
+        goal_entry.pack(side=tk.RIGHT)
+        
+        # Water per reminder
+        water_frame = tk.Frame(settings_frame, bg=self.bg_color)
+        water_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(water_frame, text="Water per Reminder (ML):", style='Custom.TLabel').pack(side=tk.LEFT)
+        self.water_var = tk.StringVar(value=str(self.settings["water_per_reminder"]))
+        water_entry = tk.Entry(water_frame, textvariable=self.water_var, width=10,
+                              font=('Arial', 10), justify='center')
+        water_entry.pack(side=tk.RIGHT)
+        
+        # Reminder Interval
+        interval_frame = tk.Frame(settings_frame, bg=self.bg_color)
+        interval_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(interval_frame, text="Reminder Interval (minutes):", style='Custom.TLabel').pack(side=tk.LEFT)
+        self.interval_var = tk.StringVar(value=str(self.settings["reminder_interval_min"]))
+        interval_entry = tk.Entry(interval_frame, textvariable=self.interval_var, width=10,
+                                 font=('Arial', 10), justify='center')
+        interval_entry.pack(side=tk.RIGHT)
+        
+        # Time Range
+        time_frame = tk.Frame(settings_frame, bg=self.bg_color)
+        time_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(time_frame, text="Active Hours:", style='Custom.TLabel').pack(side=tk.LEFT)
+        
+        time_inputs = tk.Frame(time_frame, bg=self.bg_color)
+        time_inputs.pack(side=tk.RIGHT)
+        
+        self.start_time_var = tk.StringVar(value=self.settings["start_time"])
+        start_entry = tk.Entry(time_inputs, textvariable=self.start_time_var, width=6,
+                              font=('Arial', 10), justify='center')
+        start_entry.pack(side=tk.LEFT)
+        
+        ttk.Label(time_inputs, text=" to ", style='Custom.TLabel').pack(side=tk.LEFT)
+        
+        self.end_time_var = tk.StringVar(value=self.settings["end_time"])
+        end_entry = tk.Entry(time_inputs, textvariable=self.end_time_var, width=6,
+                            font=('Arial', 10), justify='center')
+        end_entry.pack(side=tk.LEFT)
+        
+        # Custom Message
+        msg_frame = tk.Frame(settings_frame, bg=self.bg_color)
+        msg_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(msg_frame, text="Custom Message:", style='Custom.TLabel').pack(anchor=tk.W)
+        self.message_var = tk.StringVar(value=self.settings["custom_message"])
+        msg_entry = tk.Entry(msg_frame, textvariable=self.message_var, width=40,
+                            font=('Arial', 10))
+        msg_entry.pack(fill=tk.X, pady=(5, 0))
+        
+        # Control Buttons
+        button_frame = tk.Frame(main_frame, bg=self.bg_color)
+        button_frame.pack(fill=tk.X, pady=20)
+        
+        self.start_btn = tk.Button(button_frame, text="🚀 Start Reminders", 
+                                  command=self.toggle_reminders,
+                                  bg=self.accent_color, fg='white',
+                                  font=('Arial', 12, 'bold'),
+                                  relief=tk.FLAT, padx=20, pady=10)
+        self.start_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        save_btn = tk.Button(button_frame, text="💾 Save Settings",
+                            command=self.save_current_settings,
+                            bg=self.button_color, fg='white',
+                            font=('Arial', 12, 'bold'),
+                            relief=tk.FLAT, padx=20, pady=10)
+        save_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
+        test_btn = tk.Button(button_frame, text="Test",
+                            command=self.test_reminder,
+                            bg='#e74c3c', fg='white',
+                            font=('Arial', 12, 'bold'),
+                            relief=tk.FLAT, padx=20, pady=10)
+        test_btn.pack(side=tk.LEFT)
+        
+        # Status Frame
+        status_frame = tk.LabelFrame(main_frame, text="📊 Status", 
+                                   bg=self.bg_color, fg=self.text_color,
+                                   font=('Arial', 12, 'bold'), padx=15, pady=15)
+        status_frame.pack(fill=tk.BOTH, expand=True, pady=(20, 0))
+        
+        self.status_label = tk.Label(status_frame, text="Ready to start reminders",
+                                   bg=self.bg_color, fg=self.text_color,
+                                   font=('Arial', 11), justify=tk.LEFT)
+        self.status_label.pack(anchor=tk.W)
+        
+        # Progress info
+        self.progress_label = tk.Label(status_frame, text="",
+                                     bg=self.bg_color, fg=self.accent_color,
+                                     font=('Arial', 10), justify=tk.LEFT)
+        self.progress_label.pack(anchor=tk.W, pady=(10, 0))
+        
+        # Next reminder info
+        self.next_reminder_label = tk.Label(status_frame, text="",
+                                          bg=self.bg_color, fg='#f39c12',
+                                          font=('Arial', 10), justify=tk.LEFT)
+        self.next_reminder_label.pack(anchor=tk.W, pady=(5, 0))
+        
+    def save_current_settings(self):
+        try:
+            settings = dict(self.settings)
+            settings["daily_goal_ml"] = int(self.goal_var.get())
+            settings["water_per_reminder"] = int(self.water_var.get())
+            settings["reminder_interval_min"] = int(self.interval_var.get())
+            settings["start_time"] = self.start_time_var.get().strip()
+            settings["end_time"] = self.end_time_var.get().strip()
+            settings["custom_message"] = self.message_var.get().strip()
+            
+            # Validate, compile the schedule and wake the scheduler
+            self.engine.apply_settings(settings, validate(settings))
+            
+            self.save_settings()
+            self.update_status_display()
+            self.status_label.config(text="✅ Settings saved successfully!")
+            self.root.after(3000, lambda: self.status_label.config(text="Ready to start reminders"))
+            
+        except ValueError as e:
+            from tkinter import messagebox
+            messagebox.showerror("Invalid Input", "Please check your input values:\n- Numbers must be valid integers\n- Times must be in HH:MM format")
+    
+    def load_settings_into_form(self):
+        if not self.form_built:
+            return
+        self.goal_var.set(str(self.settings["daily_goal_ml"]))
+        self.water_var.set(str(self.settings["water_per_reminder"]))
+        self.interval_var.set(str(self.settings["reminder_interval_min"]))
+        self.start_time_var.set(self.settings["start_time"])
+        self.end_time_var.set(self.settings["end_time"])
+        self.message_var.set(self.settings["custom_message"])
+    
+    def toggle_reminders(self):
+        if not self.running:
+            self.save_current_settings()
+            self.engine.start()
+            self.start_btn.config(text="⏹️ Stop Reminders", bg='#e74c3c')
+            self.status_label.config(text="🔔 Reminders are active!")
+            
+            self.update_status_display()
+        else:
+            self.engine.stop()
+            self.cancel_status_timer()
+            self.start_btn.config(text="🚀 Start Reminders", bg=self.accent_color)
+            self.status_label.config(text="⏸️ Reminders stopped")
+            self.progress_label.config(text="")
+            self.next_reminder_label.config(text="")
+    
+    def test_reminder(self):
+        # Shown like a reminder but kept out of the history and today's totals
+        self.popup.show(self.settings["custom_message"], self.settings["water_per_reminder"],
+                        test=True)
+    
+    def setup_channel(self):
+        # The engine thread never touches Tk: it queues reminders on the
+        # channel and the Tk thread drains them.
+        self.channel = ReminderChannel()
+        self.engine.notifier = self.channel
+        self.engine.on_settings_changed = self.channel.mark_settings_changed
+        self.wake_pipe = None
+        self.waker = None
+        
+        if hasattr(self.root.tk, 'createfilehandler'):
+            # Wake the main loop through a pipe only when something is queued
+            read_fd, write_fd = os.pipe()
+            self.wake_pipe = (read_fd, write_fd)
+            self.channel.on_ready = lambda: os.write(write_fd, b'\0')
+            self.root.tk.createfilehandler(read_fd, tk.READABLE, self.on_channel_ready)
+        elif self.root.tk.call('info', 'exists', 'tcl_platform(threaded)'):
+            # No file handlers on Windows, but a threaded Tcl takes calls
+            # from other threads: a waker thread posts an event only when
+            # something is queued. Such a call waits for the Tk thread, so
+            # the engine thread only sets a flag and never blocks.
+            self.root.bind('<<ReminderReady>>', lambda event: self.drain_reminders())
+            self.ready = threading.Event()
+            self.waking = True
+            self.channel.on_ready = self.ready.set
+            self.waker = threading.Thread(target=self.post_ready, name="hydrator-tk-waker",
+                                          daemon=True)
+        else:
+            self.root.after(DRAIN_POLL_MS, self.poll_channel)
+    
+    def post_ready(self):
+        # Waker thread, started once the main loop runs
+        while True:
+            self.ready.wait()
+            self.ready.clear()
+            if not self.waking:
+                return
+            try:
+                self.root.event_generate('<<ReminderReady>>', when='tail')
+            except (RuntimeError, tk.TclError):
+                # Main loop gone
+                return
+    
+    def on_channel_ready(self, fd, mask):
+        os.read(fd, 512)
+        self.drain_reminders()
+    
+    def poll_channel(self):
+        self.drain_reminders()
+        self.root.after(DRAIN_POLL_MS, self.poll_channel)
+    
+    def drain_reminders(self):
+        for function in self.channel.take_calls():
+            function()
+        
+        if self.channel.take_settings_changed():
+            # The settings file was edited on disk and already hot-applied
+            self.load_settings_into_form()
+            self.update_status_display()
+        
+        # Everything missed while the GUI was busy becomes a single popup
+        reminder = self.channel.drain()
+        if reminder:
+            message, amount, count = reminder
+            self.show_water_reminder(amount, count, self.channel.drained_since)
+            self.update_status_display()
+    
+    def show_water_reminder(self, amount, count=1, fired_at=None):
+        self.popup.show(self.settings["custom_message"], amount, count, fired_at)
+    
+    def start_lag_sampling(self):
+        # A callback due every LAG_SAMPLE_MS; how late it runs is the loop lag
+        self.lag_due = time.perf_counter() + LAG_SAMPLE_MS / 1000
+        self.root.after(LAG_SAMPLE_MS, self.sample_loop_lag)
+    
+    def sample_loop_lag(self):
+        now = time.perf_counter()
+        self.engine.metrics.tk_loop_lag.observe(max(now - self.lag_due, 0))
+        self.lag_due = now + LAG_SAMPLE_MS / 1000
+        self.root.after(LAG_SAMPLE_MS, self.sample_loop_lag)
+    
+    def acknowledge(self):
+        # `hydrator ack`: answer the popup, or log a drink if none is up
+        if self.popup.visible:
+            self.popup.hide(ACKNOWLEDGED)
+        else:
+            self.engine.record(ACKNOWLEDGED, self.settings["water_per_reminder"])
+            self.update_status_display()
+    
+    def raise_window(self):
+        if not self.form_built:
+            self.build_form()
+        else:
+            # The countdown timer was cancelled when the window was closed
+            self.update_status_display()
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+    
+    def on_popup_closed(self, kind, amount, count):
+        # One event per reminder the popup stood for, so a coalesced popup
+        # adds as many acknowledgements as it covered reminders, with the mL
+        # split between them
+        for index in range(count):
+            self.engine.record(kind, amount // count + (1 if index < amount % count else 0))
+        self.update_status_display()
+    
+    def get_next_reminder_time(self, now=None):
+        return self.engine.get_next_reminder_time(now)
+    
+    def set_label_text(self, label, text):
+        # Skip the Tk round-trip when nothing changed
+        if label.cget('text') != text:
+            label.config(text=text)
+    
+    def cancel_status_timer(self):
+        if self.status_timer:
+            self.root.after_cancel(self.status_timer)
+            self.status_timer = None
+    
+    def update_status_display(self):
+        # Redrawn when a reminder fires, settings change or the minute rolls
+        # over; only one timer is ever pending.
+        self.cancel_status_timer()
+        if self.running and self.form_built:
+            now = self.engine.clock.now()
+            
+            # Calculate daily progress
+            total_reminders_today = self.calculate_daily_reminders()
+            totals = self.engine.today_totals()
+            goal = self.settings['daily_goal_ml']
+            
+            progress_text = f"Today: {totals.consumed_ml}/{goal} mL ({totals.acknowledged}/{total_reminders_today} reminders)"
+            if totals.consumed_ml >= goal:
+                progress_text += " 🎉"
+            self.set_label_text(self.progress_label, progress_text)
+            
+            # Next reminder time
+            next_time = self.get_next_reminder_time(now)
+            if next_time:
+                time_until = next_time - now
+                if time_until.total_seconds() > 0:
+                    hours = int(time_until.total_seconds() // 3600)
+                    minutes = int((time_until.total_seconds() % 3600) // 60)
+                    remaining = self.engine.count_remaining(now)
+                    next_text = f"Next reminder: {next_time.strftime('%H:%M')} (in {hours}h {minutes}m, {remaining} left today)"
+                    self.set_label_text(self.next_reminder_label, next_text)
+            elif self.engine.paused:
+                self.set_label_text(self.next_reminder_label, "⏸️ Reminders paused")
+            
+            # Wake again just after the next minute boundary
+            delay_ms = 60000 - (now.second * 1000 + now.microsecond // 1000)
+            self.status_timer = self.root.after(delay_ms + 50, self.update_status_display)
+    
+    def calculate_daily_reminders(self):
+        return self.engine.calculate_daily_reminders()
+    
+    def should_show_reminder(self, now):
+        return self.engine.should_show_reminder(now)
+    
+    def on_closing(self):
+        # Nothing is drained from here on, so stop waking the Tk thread, then
+        # let a notifier dispatcher (--notify) flush before the engine writes
+        # the final metrics and the wake pipe goes away
+        self.channel.on_ready = None
+        if self.waker:
+            self.waking = False
+            self.ready.set()
+        notifier = self.engine.notifier
+        if notifier is not self.channel and hasattr(notifier, "close"):
+            notifier.close()
+        self.engine.close()
+        self.save_settings()
+        if self.wake_pipe:
+            self.root.tk.deletefilehandler(self.wake_pipe[0])
+            for fd in self.wake_pipe:
+                os.close(fd)
+        self.root.destroy()
+    
+    def on_window_close(self):
+        if not self.background:
+            self.on_closing()
+            return
+        # Keep reminding in the background; `hydrator` reopens the window and
+        # `hydrator quit` exits
+        self.cancel_status_timer()
+        self.root.withdraw()
+    
+    def run(self):
+        self.root.protocol("WM_DELETE_WINDOW", self.on_window_close)
+        # Anything queued before the loop started had no one to wake
+        self.root.after_idle(self.drain_reminders)
+        if self.waker:
+            # event_generate from another thread fails until the loop runs
+            self.root.after_idle(self.waker.start)
+        self.root.mainloop()
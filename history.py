@@ -0,0 +1,163 @@
+import datetime
+import os
+import threading
+
+HISTORY_FILE = "hydration_history.log"
+
+# Event kinds, one character each in the log
+FIRED = "F"
+ACKNOWLEDGED = "A"
+TIMED_OUT = "T"
+DISMISSED = "D"
+KINDS = (FIRED, ACKNOWLEDGED, TIMED_OUT, DISMISSED)
+
+# Pending writes are fsynced together at most this long after the first one
+FSYNC_SECONDS = 2.0
+
+def local_timestamp(moment):
+    # Seconds since 1970-01-01 on the local wall clock, so day and hour of day
+    # are plain integer divisions (ts // 86400, ts // 3600 % 24)
+    delta = moment.replace(tzinfo=None) - datetime.datetime(1970, 1, 1)
+    return delta.days * 86400 + delta.seconds
+
+def parse_line(line):
+    # "ts,kind,amount,interval,profile" -> tuple, or None for a torn line
+    parts = line.rstrip("\n").split(",", 4)
+    if len(parts) != 5 or parts[1] not in KINDS:
+        return None
+    try:
+        return int(parts[0]), parts[1], int(parts[2]), int(parts[3]), parts[4]
+    except ValueError:
+        return None
+
+class DayTotals:
+    __slots__ = ("day", "fired", "acknowledged", "timed_out", "dismissed", "consumed_ml")
+
+    def __init__(self, day):
+        self.day = day
+        self.fired = 0
+        self.acknowledged = 0
+        self.timed_out = 0
+        self.dismissed = 0
+        self.consumed_ml = 0
+
+    def add(self, kind, amount):
+        if kind == FIRED:
+            self.fired += 1
+        elif kind == ACKNOWLEDGED:
+            self.acknowledged += 1
+            self.consumed_ml += amount
+        elif kind == TIMED_OUT:
+            self.timed_out += 1
+        elif kind == DISMISSED:
+            self.dismissed += 1
+
+class NullHistory:
+    # Drop-in for HistoryLog when nothing should be persisted (simulations)
+    def append(self, kind, amount, interval=0, profile=None, now=None):
+        pass
+
+    def today(self, day=None):
+        return DayTotals(day or datetime.date.today())
+
+    def close(self):
+        pass
+
+class HistoryLog:
+    # Append-only line log of reminder events plus a tiny per-day index
+    # ("YYYY-MM-DD,offset" lines) so today's totals are rebuilt from today's
+    # events alone instead of replaying the whole history.
+    def __init__(self, path=HISTORY_FILE, profile="default"):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.profile = profile
+        self.lock = threading.Lock()
+        self.file = None
+        self.sync_timer = None
+        entry = self.last_index_entry()
+        self.indexed_day = entry[0] if entry else None
+        self.totals = self.load_today(datetime.date.today(), entry)
+
+    def open(self):
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        return self.file
+
+    def last_index_entry(self):
+        # Only the tail of the index is read
+        try:
+            with open(self.index_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 64))
+                tail = f.read().decode("ascii", "replace").splitlines()
+        except OSError:
+            return None
+        for line in reversed(tail):
+            day, sep, offset = line.partition(",")
+            if sep and offset.isdigit():
+                try:
+                    return datetime.date.fromisoformat(day), int(offset)
+                except ValueError:
+                    continue
+        return None
+
+    def load_today(self, today, entry):
+        totals = DayTotals(today)
+        if entry is None or entry[0] != today:
+            return totals
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                f.seek(min(entry[1], os.path.getsize(self.path)))
+                for line in f:
+                    event = parse_line(line)
+                    if event:
+                        totals.add(event[1], event[2])
+        except OSError:
+            pass
+        return totals
+
+    def append(self, kind, amount, interval=0, profile=None, now=None):
+        now = now or datetime.datetime.now()
+        line = f"{local_timestamp(now)},{kind},{int(amount)},{int(interval)},{profile or self.profile}\n"
+        with self.lock:
+            f = self.open()
+            if self.indexed_day != now.date():
+                # First event of a new day: record where it starts
+                f.flush()
+                with open(self.index_path, "a", encoding="ascii") as index:
+                    index.write(f"{now.date().isoformat()},{f.tell()}\n")
+                self.indexed_day = now.date()
+            if self.totals.day != now.date():
+                self.totals = DayTotals(now.date())
+            f.write(line)
+            self.totals.add(kind, amount)
+            if self.sync_timer is None:
+                self.sync_timer = threading.Timer(FSYNC_SECONDS, self.sync)
+                self.sync_timer.daemon = True
+                self.sync_timer.start()
+
+    def sync(self):
+        with self.lock:
+            self.sync_timer = None
+            if self.file:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def today(self, day=None):
+        # Totals for the current day; O(1)
+        day = day or datetime.date.today()
+        with self.lock:
+            if self.totals.day != day:
+                self.totals = DayTotals(day)
+            return self.totals
+
+    def close(self):
+        with self.lock:
+            if self.sync_timer:
+                self.sync_timer.cancel()
+                self.sync_timer = None
+            if self.file:
+                self.file.flush()
+                os.fsync(self.file.fileno())
+                self.file.close()
+                self.file = None
@@ -0,0 +1,57 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Startup-optimized build: a onedir bundle (nothing is unpacked to a temp
+# directory on every launch), no UPX (nothing to decompress), and the stdlib
+# parts Hydrator never imports left out. Build with
+#     pyinstaller hydrator-fast.spec
+# and start dist/Hydrator/Hydrator.exe --background at login.
+# NumPy is excluded, so `Hydrator report` needs the regular build or a source
+# checkout.
+
+
+a = Analysis(
+    ['hydrator.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[
+        'numpy',
+        'unittest', 'doctest', 'pdb', 'pydoc', 'pydoc_data',
+        'lib2to3', 'distutils', 'setuptools', 'pip', 'ensurepip', 'venv',
+        'tkinter.test', 'test', 'idlelib', 'turtle', 'turtledemo',
+        'sqlite3', 'xmlrpc', 'curses', 'tkinter.tix',
+    ],
+    noarchive=False,
+    optimize=1,
+)
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name='Hydrator',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='Hydrator',
+)
@@ -1,459 +1,356 @@
+import argparse
 import json
-import os
-import time
-import datetime
-import tkinter as tk
-from tkinter import ttk, messagebox
-import threading
+import signal
 import sys
-from tkinter import font
-
-class WaterReminderGUI:
-    def __init__(self):
-        self.root = tk.Tk()
-        self.setup_window()
-        self.load_settings()
-        self.reminder_thread = None
-        self.running = False
-        self.triggered_times = set()
-        self.setup_gui()
-        self.center_window()
-        
-    def setup_window(self):
-        self.root.title("💧 Hydrator")
-        self.root.geometry("500x650")
-        self.root.resizable(False, False)
-        
-        # Set icon (creates a simple water drop icon)
-        try:
-            # Create icon data
-            icon_data = """
-            iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAYAAABzenr0AAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAAdgAAAHYBTnsmCAAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAIXSURBVFiFtZc9SwNBEIafRLBQsLGwsLa0sLW1tbW1tLGwsLCwsLGwsLW1tbW1tLGwsLCwsLGwsLW1tbW1tbGwsLCwsLGwsLW1tbW1tbGwsLCwsLGwsLW1tbW1tbGwsLCwsLGwsLW1tbW1tbGw==
-            """
-            self.root.iconbitmap(default='water_icon.ico')
-        except:
-            pass
-        
-        # Modern color scheme
-        self.bg_color = "#2c3e50"
-        self.accent_color = "#3498db"
-        self.text_color = "#ecf0f1"
-        self.button_color = "#34495e"
-        
-        self.root.configure(bg=self.bg_color)
-        
-    def center_window(self):
-        self.root.update_idletasks()
-        x = (self.root.winfo_screenwidth() // 2) - (500 // 2)
-        y = (self.root.winfo_screenheight() // 2) - (650 // 2)
-        self.root.geometry(f"500x650+{x}+{y}")
-    
-    def load_settings(self):
-        self.default_settings = {
-            "daily_goal_ml": 2000,
-            "reminder_interval_min": 30,
-            "start_time": "08:00",
-            "end_time": "18:00",
-            "water_per_reminder": 250,
-            "sound_enabled": True,
-            "custom_message": "Time to drink water!"
-        }
-        
-        try:
-            if os.path.exists("water_settings.json"):
-                with open("water_settings.json", "r") as f:
-                    loaded = json.load(f)
-                    self.settings = {**self.default_settings, **loaded}
-            else:
-                self.settings = self.default_settings.copy()
-                self.save_settings()
-        except:
-            self.settings = self.default_settings.copy()
-    
-    def save_settings(self):
-        try:
-            with open("water_settings.json", "w") as f:
-                json.dump(self.settings, f, indent=4)
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save settings: {str(e)}")
-    
-    def setup_gui(self):
-        # Configure ttk styles
-        style = ttk.Style()
-        style.theme_use('clam')
-        
-        # Configure custom styles
-        style.configure('Title.TLabel', 
-                       background=self.bg_color, 
-                       foreground=self.accent_color,
-                       font=('Arial', 16, 'bold'))
-        
-        style.configure('Custom.TLabel',
-                       background=self.bg_color,
-                       foreground=self.text_color,
-                       font=('Arial', 10))
-        
-        style.configure('Custom.TButton',
-                       background=self.button_color,
-                       foreground=self.text_color,
-                       font=('Arial', 10, 'bold'),
-                       borderwidth=0)
-        
-        style.map('Custom.TButton',
-                 background=[('active', self.accent_color)])
-        
-        # Main container
-        main_frame = tk.Frame(self.root, bg=self.bg_color, padx=20, pady=20)
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Title
-        title_label = ttk.Label(main_frame, text="💧 Hydrator", style='Title.TLabel')
-        title_label.pack(pady=(0, 30))
-        
-        # Settings Frame
-        settings_frame = tk.LabelFrame(main_frame, text="⚙️ Settings", 
-                                     bg=self.bg_color, fg=self.text_color,
-                                     font=('Arial', 12, 'bold'), padx=15, pady=15)
-        settings_frame.pack(fill=tk.X, pady=(0, 20))
-        
-        # Daily Goal
-        goal_frame = tk.Frame(settings_frame, bg=self.bg_color)
-        goal_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(goal_frame, text="Daily Goal (ML):", style='Custom.TLabel').pack(side=tk.LEFT)
-        self.goal_var = tk.StringVar(value=str(self.settings["daily_goal_ml"]))
-        goal_entry = tk.Entry(goal_frame, textvariable=self.goal_var, width=10, 
-                             font=('Arial', 10), justify='center')
-        goal_entry.pack(side=tk.RIGHT)
-        
-        # Water per reminder
-        water_frame = tk.Frame(settings_frame, bg=self.bg_color)
-        water_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(water_frame, text="Water per Reminder (ML):", style='Custom.TLabel').pack(side=tk.LEFT)
-        self.water_var = tk.StringVar(value=str(self.settings["water_per_reminder"]))
-        water_entry = tk.Entry(water_frame, textvariable=self.water_var, width=10,
-                              font=('Arial', 10), justify='center')
-        water_entry.pack(side=tk.RIGHT)
-        
-        # Reminder Interval
-        interval_frame = tk.Frame(settings_frame, bg=self.bg_color)
-        interval_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(interval_frame, text="Reminder Interval (minutes):", style='Custom.TLabel').pack(side=tk.LEFT)
-        self.interval_var = tk.StringVar(value=str(self.settings["reminder_interval_min"]))
-        interval_entry = tk.Entry(interval_frame, textvariable=self.interval_var, width=10,
-                                 font=('Arial', 10), justify='center')
-        interval_entry.pack(side=tk.RIGHT)
-        
-        # Time Range
-        time_frame = tk.Frame(settings_frame, bg=self.bg_color)
-        time_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(time_frame, text="Active Hours:", style='Custom.TLabel').pack(side=tk.LEFT)
-        
-        time_inputs = tk.Frame(time_frame, bg=self.bg_color)
-        time_inputs.pack(side=tk.RIGHT)
-        
-        self.start_time_var = tk.StringVar(value=self.settings["start_time"])
-        start_entry = tk.Entry(time_inputs, textvariable=self.start_time_var, width=6,
-                              font=('Arial', 10), justify='center')
-        start_entry.pack(side=tk.LEFT)
-        
-        ttk.Label(time_inputs, text=" to ", style='Custom.TLabel').pack(side=tk.LEFT)
-        
-        self.end_time_var = tk.StringVar(value=self.settings["end_time"])
-        end_entry = tk.Entry(time_inputs, textvariable=self.end_time_var, width=6,
-                            font=('Arial', 10), justify='center')
-        end_entry.pack(side=tk.LEFT)
-        
-        # Custom Message
-        msg_frame = tk.Frame(settings_frame, bg=self.bg_color)
-        msg_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(msg_frame, text="Custom Message:", style='Custom.TLabel').pack(anchor=tk.W)
-        self.message_var = tk.StringVar(value=self.settings["custom_message"])
-        msg_entry = tk.Entry(msg_frame, textvariable=self.message_var, width=40,
-                            font=('Arial', 10))
-        msg_entry.pack(fill=tk.X, pady=(5, 0))
-        
-        # Control Buttons
-        button_frame = tk.Frame(main_frame, bg=self.bg_color)
-        button_frame.pack(fill=tk.X, pady=20)
-        
-        self.start_btn = tk.Button(button_frame, text="🚀 Start Reminders", 
-                                  command=self.toggle_reminders,
-                                  bg=self.accent_color, fg='white',
-                                  font=('Arial', 12, 'bold'),
-                                  relief=tk.FLAT, padx=20, pady=10)
-        self.start_btn.pack(side=tk.LEFT, padx=(0, 10))
-        
-        save_btn = tk.Button(button_frame, text="💾 Save Settings",
-                            command=self.save_current_settings,
-                            bg=self.button_color, fg='white',
-                            font=('Arial', 12, 'bold'),
-                            relief=tk.FLAT, padx=20, pady=10)
-        save_btn.pack(side=tk.LEFT, padx=(0, 10))
-        
-        test_btn = tk.Button(button_frame, text="Test",
-                            command=self.test_reminder,
-                            bg='#e74c3c', fg='white',
-                            font=('Arial', 12, 'bold'),
-                            relief=tk.FLAT, padx=20, pady=10)
-        test_btn.pack(side=tk.LEFT)
-        
-        # Status Frame
-        status_frame = tk.LabelFrame(main_frame, text="📊 Status", 
-                                   bg=self.bg_color, fg=self.text_color,
-                                   font=('Arial', 12, 'bold'), padx=15, pady=15)
-        status_frame.pack(fill=tk.BOTH, expand=True, pady=(20, 0))
-        
-        self.status_label = tk.Label(status_frame, text="Ready to start reminders",
-                                   bg=self.bg_color, fg=self.text_color,
-                                   font=('Arial', 11), justify=tk.LEFT)
-        self.status_label.pack(anchor=tk.W)
-        
-        # Progress info
-        self.progress_label = tk.Label(status_frame, text="",
-                                     bg=self.bg_color, fg=self.accent_color,
-                                     font=('Arial', 10), justify=tk.LEFT)
-        self.progress_label.pack(anchor=tk.W, pady=(10, 0))
-        
-        # Next reminder info
-        self.next_reminder_label = tk.Label(status_frame, text="",
-                                          bg=self.bg_color, fg='#f39c12',
-                                          font=('Arial', 10), justify=tk.LEFT)
-        self.next_reminder_label.pack(anchor=tk.W, pady=(5, 0))
-        
-    def save_current_settings(self):
+
+import control
+from engine import ReminderEngine, ConsoleNotifier, LogNotifier, SETTINGS_FILE
+from history import HistoryLog, HISTORY_FILE
+
+# Commands forwarded to the running instance over the control socket
+CONTROL_COMMANDS = ("status", "snooze", "ack", "reload", "pause", "resume", "quit")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="hydrator", description="💧 Hydrator water reminder")
+    parser.add_argument("command", nargs="?", choices=("run", "report", "simulate") + CONTROL_COMMANDS,
+                        default="run",
+                        help="run reminders (default), print a hydration report, replay the "
+                             "schedule in accelerated virtual time, or control the running instance")
+    parser.add_argument("minutes", nargs="?", type=int,
+                        help="snooze: minutes to hold reminders back (default: 15)")
+    parser.add_argument("--instance", default="default",
+                        help="name of the single running instance to start or control")
+    parser.add_argument("--headless", action="store_true",
+                        help="run the scheduler without a window")
+    parser.add_argument("--background", action="store_true",
+                        help="start reminders right away and only build the settings "
+                             "window when it is opened (for launching at login)")
+    parser.add_argument("--settings", default=SETTINGS_FILE,
+                        help="settings file (default: %(default)s)")
+    parser.add_argument("--log", metavar="FILE",
+                        help="headless: write reminders to FILE instead of stdout")
+    parser.add_argument("--profiles", metavar="FILE",
+                        help="headless: schedule every profile listed in FILE (JSON)")
+    parser.add_argument("--workers", type=int, metavar="N",
+                        help="headless --profiles: shard profiles over N worker processes")
+    parser.add_argument("--notify", action="append", metavar="BACKEND",
+                        choices=("popup", "console", "json", "dbus"),
+                        help="deliver reminders through BACKEND: popup, console, json (JSON "
+                             "lines on stdout) or dbus (desktop notifications); repeatable "
+                             "(default: popup with a window, console headless)")
+    parser.add_argument("--webhook", metavar="URL",
+                        help="also POST reminders in batches to a local relay at URL")
+    parser.add_argument("--history", default=HISTORY_FILE,
+                        help="reminder history log (default: %(default)s)")
+    parser.add_argument("--json", action="store_true",
+                        help="report/simulate: print JSON instead of tables")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", metavar="FILE",
+                        help="rewrite FILE with Prometheus metrics every few seconds")
+    parser.add_argument("--days", type=int, default=7,
+                        help="simulate: days to replay (default: %(default)s)")
+    parser.add_argument("--start", metavar="YYYY-MM-DD",
+                        help="simulate: first simulated day (default: today)")
+    parser.add_argument("--mode", choices=("engine", "fleet"),
+                        help="simulate: one engine per profile, or one fleet scheduler "
+                             "(default: fleet with --profiles, else engine)")
+    parser.add_argument("--jitter", type=float, default=0.0, metavar="SECONDS",
+                        help="simulate: add up to SECONDS of random oversleep to every wait")
+    parser.add_argument("--seed", help="simulate: random seed for --jitter")
+    parser.add_argument("--events", action="store_true",
+                        help="simulate: print every fired reminder")
+    return parser.parse_args(argv)
+
+def run_control(args, line):
+    # Forward a command to the running instance and print its reply
+    try:
+        _, socket_path = control.instance_paths(args.instance)
+        reply = control.send(socket_path, line)
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(reply, indent=2))
+    elif not reply.get("ok"):
+        print(reply.get("error"), file=sys.stderr)
+    elif len(reply) == 1:
+        print("ok")
+    else:
+        for key, value in reply.items():
+            if key != "ok":
+                print(f"{key}: {value}")
+    return 0 if reply.get("ok") else 1
+
+def serve_control(args, controller):
+    # Only reached after main() resolved the same paths for the lock
+    _, socket_path = control.instance_paths(args.instance)
+    server = control.ControlServer(socket_path, controller.handle)
+    try:
+        server.start()
+    except OSError as e:
+        print(f"Control socket unavailable: {e}")
+    return server
+
+def build_metrics(args):
+    # None unless asked for, so the scheduler's hot path skips instrumentation
+    if args.metrics_port is None and not args.metrics_file:
+        return None
+    from metrics import Metrics
+    metrics = Metrics()
+    if args.metrics_port is not None:
+        metrics.serve(args.metrics_port)
+    if args.metrics_file:
+        metrics.dump_to(args.metrics_file)
+    return metrics
+
+def build_notifier(args, notifier, metrics=None, popup=None):
+    # notifier itself unless --notify/--webhook ask for other backends; then a
+    # Dispatcher that delivers from its own asyncio thread. Raises
+    # RuntimeError/ValueError for a backend that can't work here.
+    if not args.notify and not args.webhook:
+        return notifier
+    import notifiers
+    backends = []
+    for name in dict.fromkeys(args.notify or ["popup" if popup else "console"]):
+        if name == "popup":
+            if popup is None:
+                raise ValueError("The popup notifier needs the window; drop --headless")
+            backends.append(notifiers.NotifierBackend(popup, "popup"))
+        elif name == "console":
+            backends.append(notifiers.NotifierBackend(notifier, "console"))
+        elif name == "json":
+            backends.append(notifiers.JsonLinesBackend())
+        elif name == "dbus":
+            backends.append(notifiers.DBusBackend())
+    if args.webhook:
+        backends.append(notifiers.WebhookBackend(args.webhook))
+    dispatcher = notifiers.Dispatcher(backends, metrics)
+    dispatcher.start()
+    return dispatcher
+
+def read_profiles(path):
+    # load_profiles() with every entry validated up front, so nothing has
+    # started when one is bad. Raises OSError/ValueError/KeyError/TypeError;
+    # a bad entry is named by its id.
+    from fleet import load_profiles
+    from settings_store import normalize, validate
+    profiles = load_profiles(path)
+    for profile_id, settings in profiles.items():
         try:
-            self.settings["daily_goal_ml"] = int(self.goal_var.get())
-            self.settings["water_per_reminder"] = int(self.water_var.get())
-            self.settings["reminder_interval_min"] = int(self.interval_var.get())
-            self.settings["start_time"] = self.start_time_var.get().strip()
-            self.settings["end_time"] = self.end_time_var.get().strip()
-            self.settings["custom_message"] = self.message_var.get().strip()
-            
-            # Validate time format
-            datetime.datetime.strptime(self.settings["start_time"], "%H:%M")
-            datetime.datetime.strptime(self.settings["end_time"], "%H:%M")
-            
-            self.save_settings()
-            self.status_label.config(text="✅ Settings saved successfully!")
-            self.root.after(3000, lambda: self.status_label.config(text="Ready to start reminders"))
-            
-        except ValueError as e:
-            messagebox.showerror("Invalid Input", "Please check your input values:\n- Numbers must be valid integers\n- Times must be in HH:MM format")
-    
-    def toggle_reminders(self):
-        if not self.running:
-            self.save_current_settings()
-            self.running = True
-            self.triggered_times.clear()
-            self.start_btn.config(text="⏹️ Stop Reminders", bg='#e74c3c')
-            self.status_label.config(text="🔔 Reminders are active!")
-            
-            self.reminder_thread = threading.Thread(target=self.reminder_loop, daemon=True)
-            self.reminder_thread.start()
-            
-            self.update_status_display()
-        else:
-            self.running = False
-            self.start_btn.config(text="🚀 Start Reminders", bg=self.accent_color)
-            self.status_label.config(text="⏸️ Reminders stopped")
-            self.progress_label.config(text="")
-            self.next_reminder_label.config(text="")
-    
-    def test_reminder(self):
-        self.show_water_reminder(self.settings["water_per_reminder"])
-    
-    def show_water_reminder(self, amount):
-        # Create error-style popup that stays on top
-        def show_error_popup():
-            error_root = tk.Toplevel()
-            error_root.title("💧 HYDRATION ALERT 💧")
-            error_root.geometry("400x200")
-            error_root.configure(bg='#e74c3c')
-            error_root.resizable(False, False)
-            error_root.attributes('-topmost', True)
-            
-            # Center the error window
-            error_root.update_idletasks()
-            x = (error_root.winfo_screenwidth() // 2) - (400 // 2)
-            y = (error_root.winfo_screenheight() // 2) - (200 // 2)
-            error_root.geometry(f"400x200+{x}+{y}")
-            
-            # Error icon and message
-            main_frame = tk.Frame(error_root, bg='#e74c3c', padx=20, pady=20)
-            main_frame.pack(fill=tk.BOTH, expand=True)
-            
-            # Big warning icon
-            icon_label = tk.Label(main_frame, text="⚠️", font=('Arial', 48), 
-                                bg='#e74c3c', fg='white')
-            icon_label.pack(pady=(0, 10))
-            
-            # Custom message
-            msg_label = tk.Label(main_frame, text=self.settings["custom_message"],
-                               font=('Arial', 14, 'bold'), bg='#e74c3c', fg='white',
-                               wraplength=350, justify=tk.CENTER)
-            msg_label.pack(pady=(0, 5))
-            
-            # Amount
-            amount_label = tk.Label(main_frame, text=f"Drink {amount} mL of water NOW!",
-                                  font=('Arial', 12), bg='#e74c3c', fg='#ffff99',
-                                  wraplength=350, justify=tk.CENTER)
-            amount_label.pack(pady=(0, 15))
-            
-            # OK button
-            ok_btn = tk.Button(main_frame, text="✅ I'LL DRINK NOW", 
-                             command=error_root.destroy,
-                             bg='white', fg='#e74c3c',
-                             font=('Arial', 12, 'bold'),
-                             relief=tk.RAISED, padx=20, pady=5)
-            ok_btn.pack()
-            
-            # Auto-close after 30 seconds
-            error_root.after(30000, error_root.destroy)
-            
-            # Make sound (system beep)
-            try:
-                error_root.bell()
-            except:
-                pass
-        
-        # Run in main thread
-        self.root.after(0, show_error_popup)
-    
-    def get_next_reminder_time(self):
+            validate(normalize(settings))
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"profile {profile_id}: {e}")
+    return profiles
+
+def build_fleet(profiles, notifier, history, metrics=None):
+    from fleet import FleetScheduler, key_to_datetime
+
+    def dispatch(profile, key):
+        notifier.notify(f"{profile.id}: {profile.custom_message}",
+                        profile.water_per_reminder)
+
+    notify_batch = getattr(notifier, "notify_batch", None)
+    if notify_batch:
+        from notifiers import Reminder
+
+        # Everything due in one tick goes to the dispatcher together
+        def dispatch_batch(due):
+            notify_batch([Reminder(profile.id, f"{profile.id}: {profile.custom_message}",
+                                   profile.water_per_reminder, key_to_datetime(key))
+                          for profile, key in due])
+
+        fleet = FleetScheduler(None, history, metrics=metrics, dispatch_batch=dispatch_batch)
+    else:
+        fleet = FleetScheduler(dispatch, history, metrics=metrics)
+    for profile_id, settings in profiles.items():
+        fleet.add_profile(profile_id, settings)
+    return fleet
+
+def build_supervisor(args, profiles, notifier, metrics=None):
+    from supervisor import Supervisor
+
+    notify_batch = getattr(notifier, "notify_batch", None)
+    if notify_batch:
+        from fleet import key_to_datetime
+        from notifiers import Reminder
+
+        # Each worker's batch goes to the dispatcher as it arrives
+        def on_events(events):
+            notify_batch([Reminder(profile_id, message, amount, key_to_datetime(key))
+                          for profile_id, key, amount, message in events])
+    else:
+        def on_events(events):
+            for profile_id, key, amount, message in events:
+                notifier.notify(message, amount)
+
+    supervisor = Supervisor(args.workers, on_events, args.history, metrics)
+    supervisor.start()
+    supervisor.add_profiles(profiles)
+    return supervisor
+
+def run_headless(args):
+    if args.log:
+        import logging
+        logging.basicConfig(filename=args.log, level=logging.INFO,
+                            format="%(asctime)s %(message)s")
+        notifier = LogNotifier()
+    else:
+        notifier = ConsoleNotifier()
+
+    # Before anything starts, so a bad file exits cleanly
+    profiles = None
+    if args.profiles:
         try:
-            now = datetime.datetime.now()
-            start_time = datetime.datetime.strptime(self.settings["start_time"], "%H:%M").time()
-            end_time = datetime.datetime.strptime(self.settings["end_time"], "%H:%M").time()
-            interval = self.settings["reminder_interval_min"]
-            
-            # Check if we're in active hours
-            current_time = now.time()
-            if current_time < start_time or current_time > end_time:
-                # Next reminder is at start time tomorrow or today
-                if current_time > end_time:
-                    next_date = now.date() + datetime.timedelta(days=1)
-                else:
-                    next_date = now.date()
-                return datetime.datetime.combine(next_date, start_time)
-            
-            # Find next interval time
-            start_datetime = datetime.datetime.combine(now.date(), start_time)
-            minutes_since_start = (now - start_datetime).total_seconds() / 60
-            
-            if minutes_since_start < 0:
-                return start_datetime
-            
-            next_interval = ((int(minutes_since_start) // interval) + 1) * interval
-            next_reminder = start_datetime + datetime.timedelta(minutes=next_interval)
-            
-            # Check if next reminder is past end time
-            end_datetime = datetime.datetime.combine(now.date(), end_time)
-            if next_reminder > end_datetime:
-                # Next reminder is tomorrow at start time
-                tomorrow = now.date() + datetime.timedelta(days=1)
-                return datetime.datetime.combine(tomorrow, start_time)
-            
-            return next_reminder
-        except:
-            return None
-    
-    def update_status_display(self):
-        if self.running:
-            now = datetime.datetime.now()
-            
-            # Calculate daily progress
-            total_reminders_today = self.calculate_daily_reminders()
-            completed_today = len(self.triggered_times)
-            water_consumed = completed_today * self.settings["water_per_reminder"]
-            
-            progress_text = f"Today: {water_consumed}/{self.settings['daily_goal_ml']} mL ({completed_today}/{total_reminders_today} reminders)"
-            self.progress_label.config(text=progress_text)
-            
-            # Next reminder time
-            next_time = self.get_next_reminder_time()
-            if next_time:
-                time_until = next_time - now
-                if time_until.total_seconds() > 0:
-                    hours = int(time_until.total_seconds() // 3600)
-                    minutes = int((time_until.total_seconds() % 3600) // 60)
-                    next_text = f"Next reminder: {next_time.strftime('%H:%M')} (in {hours}h {minutes}m)"
-                    self.next_reminder_label.config(text=next_text)
-            
-            # Schedule next update
-            self.root.after(60000, self.update_status_display)  # Update every minute
-    
-    def calculate_daily_reminders(self):
+            profiles = read_profiles(args.profiles)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Can't load profiles from {args.profiles}: {e}", file=sys.stderr)
+            return 1
+    metrics = build_metrics(args)
+    try:
+        notifier = build_notifier(args, notifier, metrics)
+    except (RuntimeError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.profiles and args.workers:
+        # Workers keep their own history logs next to --history
+        engine = build_supervisor(args, profiles, notifier, metrics)
+        controller = control.FleetController(engine)
+    elif args.profiles:
+        engine = build_fleet(profiles, notifier, HistoryLog(args.history), metrics)
+        controller = control.FleetController(engine)
+    else:
+        engine = ReminderEngine(notifier=notifier, settings_path=args.settings,
+                                history=HistoryLog(args.history), metrics=metrics)
+        engine.watch_settings()
+        controller = control.Controller(engine)
+    server = serve_control(args, controller)
+    signal.signal(signal.SIGTERM, lambda signum, frame: engine.stop())
+
+    # Run the loop on the main thread; Ctrl+C or SIGTERM ends it
+    try:
+        engine.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # A second Ctrl+C (or a group-wide SIGINT arriving twice) must not
+        # cut the shutdown short: every step below has its own timeout
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        server.close()
+        if hasattr(notifier, "close"):
+            # Flush queued reminders before the final metrics dump
+            notifier.close()
+        engine.close()
+    return 0
+
+def run_report(args):
+    import analytics
+    from settings_store import SettingsStore, normalize
+
+    # Goals: per profile from --profiles, otherwise the local daily_goal_ml
+    goals = {}
+    if args.profiles:
         try:
-            start_time = datetime.datetime.strptime(self.settings["start_time"], "%H:%M")
-            end_time = datetime.datetime.strptime(self.settings["end_time"], "%H:%M")
-            interval = self.settings["reminder_interval_min"]
-            
-            total_minutes = (end_time - start_time).total_seconds() / 60
-            return int(total_minutes / interval) + 1
-        except:
+            profiles = read_profiles(args.profiles)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Can't load profiles from {args.profiles}: {e}", file=sys.stderr)
             return 1
-    
-    def reminder_loop(self):
-        last_date = None
-        
-        while self.running:
-            try:
-                now = datetime.datetime.now()
-                current_date = now.date()
-                
-                # Reset daily tracking
-                if last_date != current_date:
-                    self.triggered_times.clear()
-                    last_date = current_date
-                
-                # Check if we should show a reminder
-                if self.should_show_reminder(now):
-                    current_minute = now.hour * 60 + now.minute
-                    if current_minute not in self.triggered_times:
-                        self.triggered_times.add(current_minute)
-                        self.show_water_reminder(self.settings["water_per_reminder"])
-                
-                time.sleep(30)  # Check every 30 seconds
-                
-            except Exception as e:
-                print(f"Reminder loop error: {e}")
-                time.sleep(60)
-    
-    def should_show_reminder(self, now):
+        goals = {profile_id: normalize(settings)["daily_goal_ml"]
+                 for profile_id, settings in profiles.items()}
+    # Same fallbacks as the app: --settings, the shipped settings.json, defaults
+    default_goal = SettingsStore(args.settings).read()[0]["daily_goal_ml"]
+
+    try:
+        # Includes the per-worker shards written under --workers
+        store = analytics.open_history(args.history)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    report = analytics.build_report(store, goals, default_goal)
+    print(json.dumps(report, indent=2) if args.json else analytics.format_report(report))
+    return 0
+
+def run_simulate(args):
+    import datetime
+    import simulate
+    from settings_store import SettingsStore
+
+    if args.profiles:
         try:
-            start_time = datetime.datetime.strptime(self.settings["start_time"], "%H:%M").time()
-            end_time = datetime.datetime.strptime(self.settings["end_time"], "%H:%M").time()
-            current_time = now.time()
-            
-            # Check if we're in active hours
-            if current_time < start_time or current_time > end_time:
-                return False
-            
-            # Check if it's time for a reminder based on interval
-            start_datetime = datetime.datetime.combine(now.date(), start_time)
-            minutes_since_start = (now - start_datetime).total_seconds() / 60
-            
-            if minutes_since_start < 0:
-                return False
-            
-            interval = self.settings["reminder_interval_min"]
-            return minutes_since_start % interval < 0.5  # Within 30 seconds of interval
-            
-        except:
-            return False
-    
-    def on_closing(self):
-        self.running = False
-        self.save_settings()
-        self.root.destroy()
-    
-    def run(self):
-        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-        self.root.mainloop()
-
-def main():
-    app = WaterReminderGUI()
-    app.run()
+            profiles = read_profiles(args.profiles)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Can't load profiles from {args.profiles}: {e}", file=sys.stderr)
+            return 1
+    else:
+        # The settings the app would run with, without writing any out
+        profiles = {"default": SettingsStore(args.settings).read()[0]}
+
+    try:
+        day = datetime.date.fromisoformat(args.start) if args.start else datetime.date.today()
+    except ValueError as e:
+        print(f"Bad --start: {e}", file=sys.stderr)
+        return 2
+    start = datetime.datetime.combine(day, datetime.time())
+
+    def print_fire(profile_id, moment, slot, error, amount):
+        if error is None:
+            print(f"{moment:%Y-%m-%d %H:%M:%S.%f} {profile_id} {amount}ml unexpected")
+        else:
+            print(f"{moment:%Y-%m-%d %H:%M:%S.%f} {profile_id} {amount}ml slot {slot:%H:%M} +{error:.3f}s")
+
+    simulation = simulate.Simulation(profiles, start, args.days, args.jitter, args.seed,
+                                     print_fire if args.events else None)
+    report = simulation.run(args.mode or ("fleet" if args.profiles else "engine"))
+    print(json.dumps(report, indent=2) if args.json else simulate.format_report(report))
+    return 0 if not (report["missed"] or report["duplicates"] or report["unexpected"]) else 1
+
+def main(argv=None):
+    if getattr(sys, "frozen", False):
+        # PyInstaller build: --workers children re-run this executable
+        import multiprocessing
+        multiprocessing.freeze_support()
+    args = parse_args(argv)
+    if args.command == "report":
+        return run_report(args)
+    if args.command == "simulate":
+        return run_simulate(args)
+    if args.command in CONTROL_COMMANDS:
+        line = args.command if args.minutes is None else f"{args.command} {args.minutes}"
+        return run_control(args, line)
+
+    # One scheduler per user: a second launch just raises the running one
+    try:
+        lock_path, _ = control.instance_paths(args.instance)
+        lock = control.InstanceLock(lock_path)
+        locked = lock.acquire()
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not locked:
+        return run_control(args, "status" if args.headless or args.background else "show")
+
+    if args.headless:
+        return run_headless(args)
+
+    # Only pay for Tk when a window is actually wanted
+    from gui import WaterReminderGUI
+    metrics = build_metrics(args)
+    engine = ReminderEngine(settings_path=args.settings, history=HistoryLog(args.history),
+                            metrics=metrics)
+    controller = control.Controller(engine)
+    app = WaterReminderGUI(engine, controller, background=args.background)
+    try:
+        engine.notifier = build_notifier(args, ConsoleNotifier(), metrics, popup=app.channel)
+    except (RuntimeError, ValueError) as e:
+        print(e, file=sys.stderr)
+        app.on_closing()
+        return 1
+    server = serve_control(args, controller)
+    try:
+        app.run()
+    finally:
+        server.close()
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
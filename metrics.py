@@ -0,0 +1,182 @@
+import threading
+from bisect import bisect_left
+
+# Bucket upper bounds in seconds
+DRIFT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 30, 60, 300, 3600)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+# How often --metrics-file is rewritten, and how often the Tk loop is sampled
+DUMP_SECONDS = 15
+LAG_SAMPLE_MS = 1000
+
+class Counter:
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, value=None, amount=1):
+        with self.lock:
+            self.values[value] = self.values.get(value, 0) + amount
+
+    def get(self, value=None):
+        return self.values.get(value, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            values = sorted(self.values.items(), key=lambda item: str(item[0]))
+        if not values and self.label is None:
+            values = [(None, 0)]
+        for value, count in values:
+            labels = f'{{{self.label}="{value}"}}' if self.label else ""
+            lines.append(f"{self.name}_total{labels} {count}")
+        return lines
+
+class Histogram:
+    # Cumulative buckets in the Prometheus layout; observe() is one bisect.
+    # With a label, each label value gets its own series.
+    def __init__(self, name, help, buckets, label=None):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.label = label
+        self.lock = threading.Lock()
+        # label value -> [bucket counts, sum, count]
+        self.series = {}
+
+    def observe(self, seconds, value=None):
+        index = bisect_left(self.buckets, seconds)
+        with self.lock:
+            series = self.series.get(value)
+            if series is None:
+                series = self.series[value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = sorted(((value, list(counts), total, count)
+                             for value, (counts, total, count) in self.series.items()),
+                            key=lambda item: str(item[0]))
+        if not series and self.label is None:
+            series = [(None, [0] * (len(self.buckets) + 1), 0.0, 0)]
+        for value, counts, total, count in series:
+            label = f'{self.label}="{value}",' if self.label else ""
+            labels = f'{{{self.label}="{value}"}}' if self.label else ""
+            cumulative = 0
+            for bound, hits in zip(self.buckets + ("+Inf",), counts):
+                cumulative += hits
+                lines.append(f'{self.name}_bucket{{{label}le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{labels} {total:.6f}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class Metrics:
+    # Hot-path instruments. Components take metrics=None and guard every use
+    # with `if metrics:`, so with metrics off the cost is one attribute test.
+    def __init__(self):
+        self.reminder_drift = Histogram(
+            "hydrator_reminder_drift_seconds",
+            "How long after its scheduled slot a reminder fired", DRIFT_BUCKETS)
+        self.display_latency = Histogram(
+            "hydrator_display_latency_seconds",
+            "Time from a reminder firing to its popup being on screen", LATENCY_BUCKETS)
+        self.tk_loop_lag = Histogram(
+            "hydrator_tk_loop_lag_seconds",
+            "How late a periodic Tk main-loop callback ran", LAG_BUCKETS)
+        self.loop_iterations = Counter(
+            "hydrator_loop_iterations", "Scheduler loop iterations")
+        self.loop_errors = Counter(
+            "hydrator_loop_errors", "Exceptions caught in the scheduler loop")
+        self.reminders_fired = Counter(
+            "hydrator_reminders_fired", "Reminders handed to the notifier")
+        self.popups = Counter(
+            "hydrator_popups", "Popup windows opened and how they closed", "event")
+        self.notify_latency = Histogram(
+            "hydrator_notify_latency_seconds",
+            "Time for a notifier backend to deliver one batch of reminders",
+            LATENCY_BUCKETS, "backend")
+        self.notify_delivered = Counter(
+            "hydrator_notify_delivered", "Reminders delivered, per notifier backend", "backend")
+        self.notify_retries = Counter(
+            "hydrator_notify_retries", "Failed delivery attempts that were retried", "backend")
+        self.notify_failures = Counter(
+            "hydrator_notify_failures",
+            "Reminders a notifier backend gave up on (retries exhausted or queue full)", "backend")
+        self.server = None
+        self.dump_path = None
+        self.dump_timer = None
+
+    def instruments(self):
+        return (self.reminder_drift, self.display_latency, self.tk_loop_lag,
+                self.loop_iterations, self.loop_errors, self.reminders_fired, self.popups,
+                self.notify_latency, self.notify_delivered, self.notify_retries,
+                self.notify_failures)
+
+    def render(self):
+        # Prometheus text exposition format
+        lines = []
+        for instrument in self.instruments():
+            lines.extend(instrument.render())
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        # GET /metrics on a local port, from a daemon thread
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address[1]
+
+    def dump_to(self, path, seconds=DUMP_SECONDS):
+        # Rewrite path every `seconds` (e.g. for node_exporter's textfile collector)
+        self.dump_path = path
+        self.dump_seconds = seconds
+        self.dump_periodically()
+
+    def dump_periodically(self):
+        self.dump()
+        self.dump_timer = threading.Timer(self.dump_seconds, self.dump_periodically)
+        self.dump_timer.daemon = True
+        self.dump_timer.start()
+
+    def dump(self):
+        from settings_store import write_atomic
+        try:
+            write_atomic(self.dump_path, self.render())
+        except OSError as e:
+            print(f"Could not write metrics to {self.dump_path}: {e}")
+
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.dump_timer:
+            self.dump_timer.cancel()
+            self.dump_timer = None
+            # Leave the final numbers behind
+            self.dump()
@@ -0,0 +1,332 @@
+import asyncio
+import datetime
+import json
+import shutil
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from urllib.parse import urlsplit
+
+# Seconds one delivery attempt may take before it counts as failed
+DELIVERY_TIMEOUT = 5.0
+# Attempts after the first, and the backoff before the first of them
+DELIVERY_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+# Reminders queued per backend before the oldest are dropped
+MAX_PENDING = 10000
+# Seconds close() waits for queued reminders to go out
+CLOSE_TIMEOUT = 10.0
+
+DBUS_NAME = "org.freedesktop.Notifications"
+DBUS_PATH = "/org/freedesktop/Notifications"
+
+class Reminder:
+    __slots__ = ("profile", "message", "amount", "fired_at")
+
+    def __init__(self, profile, message, amount, fired_at=None):
+        self.profile = profile
+        self.message = message
+        self.amount = amount
+        self.fired_at = fired_at or datetime.datetime.now()
+
+    def text(self):
+        return f"{self.message} Drink {self.amount} mL of water NOW!"
+
+    def as_dict(self):
+        return {"profile": self.profile, "message": self.message, "amount": self.amount,
+                "fired_at": self.fired_at.isoformat(timespec="seconds")}
+
+class Backend(ABC):
+    # send() delivers a whole batch or raises; the dispatcher times it out and
+    # retries, calling reset() in between so a broken connection is reopened
+    name = "backend"
+
+    @abstractmethod
+    async def send(self, reminders):
+        pass
+
+    async def reset(self):
+        pass
+
+    async def close(self):
+        await self.reset()
+
+class NotifierBackend(Backend):
+    # Any object with notify(message, amount): the Tk popup channel, or the
+    # console and log notifiers. These never block, so they run on the loop.
+    def __init__(self, notifier, name):
+        self.notifier = notifier
+        self.name = name
+
+    async def send(self, reminders):
+        for reminder in reminders:
+            self.notifier.notify(reminder.message, reminder.amount)
+
+class JsonLinesBackend(Backend):
+    # One JSON object per reminder, for piping into other tools
+    name = "json"
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    async def send(self, reminders):
+        self.stream.write("".join(json.dumps(reminder.as_dict()) + "\n" for reminder in reminders))
+        self.stream.flush()
+
+class DBusBackend(Backend):
+    # Desktop notifications (org.freedesktop.Notifications). Uses one session
+    # bus connection through dbus-next when it is installed, else one gdbus
+    # call per batch. A batch becomes a single notification.
+    name = "dbus"
+
+    def __init__(self):
+        try:
+            import dbus_next
+        except ImportError:
+            dbus_next = None
+        self.use_gdbus = dbus_next is None
+        if self.use_gdbus and not shutil.which("gdbus"):
+            raise RuntimeError("Desktop notifications need dbus-next (pip install dbus-next) or gdbus")
+        self.bus = None
+        self.interface = None
+
+    async def send(self, reminders):
+        if len(reminders) == 1:
+            summary, body = "💧 Hydrator", reminders[0].text()
+        else:
+            summary = f"💧 {len(reminders)} reminders"
+            body = "\n".join(reminder.text() for reminder in reminders)
+        if self.use_gdbus:
+            await self.send_gdbus(summary, body)
+            return
+        if self.interface is None:
+            from dbus_next.aio import MessageBus
+            self.bus = await MessageBus().connect()
+            introspection = await self.bus.introspect(DBUS_NAME, DBUS_PATH)
+            proxy = self.bus.get_proxy_object(DBUS_NAME, DBUS_PATH, introspection)
+            self.interface = proxy.get_interface(DBUS_NAME)
+        await self.interface.call_notify("Hydrator", 0, "", summary, body, [], {}, -1)
+
+    async def send_gdbus(self, summary, body):
+        process = await asyncio.create_subprocess_exec(
+            "gdbus", "call", "--session", "--dest", DBUS_NAME, "--object-path", DBUS_PATH,
+            "--method", DBUS_NAME + ".Notify", "Hydrator", "0", "", summary, body, "[]", "{}", "-1",
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+        try:
+            _, errors = await process.communicate()
+        except asyncio.CancelledError:
+            # Timed out
+            process.kill()
+            raise
+        if process.returncode:
+            raise OSError(errors.decode().strip() or f"gdbus exited with {process.returncode}")
+
+    async def reset(self):
+        if self.bus:
+            self.bus.disconnect()
+        self.bus = None
+        self.interface = None
+
+class WebhookBackend(Backend):
+    # POSTs each batch as {"reminders": [...]} to a local relay over one
+    # kept-alive HTTP/1.1 connection
+    name = "webhook"
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        if parts.scheme != "http" or not parts.hostname:
+            raise ValueError(f"Webhook URL must be http://host[:port]/path, not {url!r}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.reader = None
+        self.writer = None
+
+    async def send(self, reminders):
+        body = json.dumps({"reminders": [reminder.as_dict() for reminder in reminders]}).encode()
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(f"POST {self.path} HTTP/1.1\r\n"
+                          f"Host: {self.host}:{self.port}\r\n"
+                          "Content-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n"
+                          "Connection: keep-alive\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        status, keep_alive = await self.read_response()
+        if not keep_alive:
+            await self.reset()
+        if not 200 <= status < 300:
+            raise OSError(f"relay answered HTTP {status}")
+
+    async def read_response(self):
+        # (status, whether the connection can be reused); the body is discarded
+        reader = self.reader
+        status_line = (await reader.readuntil(b"\r\n")).decode("latin-1").split()
+        if len(status_line) < 2 or not status_line[0].startswith("HTTP/"):
+            raise OSError(f"bad response from relay: {' '.join(status_line)!r}")
+        headers = {}
+        while True:
+            line = (await reader.readuntil(b"\r\n")).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close" and status_line[0] != "HTTP/1.0"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        else:
+            await reader.read()
+            keep_alive = False
+        return int(status_line[1]), keep_alive
+
+    async def reset(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+        self.reader = self.writer = None
+
+class Lane:
+    # One backend's queue; reminders wait here until its previous batch is out
+    __slots__ = ("backend", "pending", "ready", "task")
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.pending = deque()
+        self.ready = None
+        self.task = None
+
+class Dispatcher:
+    # Fans reminders out to notifier backends from an asyncio loop on its own
+    # thread. notify() and notify_batch() only queue and return, so a slow or
+    # dead backend never holds up the scheduler. Each backend sends
+    # everything queued for it as one batch, with a timeout and retries, and
+    # backends don't wait on each other.
+    def __init__(self, backends, metrics=None, timeout=DELIVERY_TIMEOUT,
+                 retries=DELIVERY_RETRIES, max_pending=MAX_PENDING):
+        self.lanes = [Lane(backend) for backend in backends]
+        self.metrics = metrics
+        self.timeout = timeout
+        self.retries = retries
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.loop = None
+        self.thread = None
+        self.closing = False
+
+    def start(self):
+        started = threading.Event()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.run_loop, args=(started,),
+                                       name="hydrator-notify", daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def run_loop(self, started):
+        asyncio.set_event_loop(self.loop)
+        for lane in self.lanes:
+            lane.ready = asyncio.Event()
+            lane.task = self.loop.create_task(self.drain(lane))
+        self.loop.call_soon(started.set)
+        self.loop.run_forever()
+        self.loop.close()
+
+    def notify(self, message, amount):
+        self.notify_batch([Reminder(None, message, amount)])
+
+    def notify_batch(self, reminders):
+        # Called from the scheduler thread with everything due in one tick
+        if not reminders:
+            return
+        woken = []
+        dropped = {}
+        with self.lock:
+            for lane in self.lanes:
+                if not lane.pending:
+                    woken.append(lane)
+                lane.pending.extend(reminders)
+                overflow = len(lane.pending) - self.max_pending
+                if overflow > 0:
+                    for _ in range(overflow):
+                        lane.pending.popleft()
+                    dropped[lane.backend.name] = overflow
+        # Only the empty -> non-empty transition needs to wake a lane
+        for lane in woken:
+            self.loop.call_soon_threadsafe(lane.ready.set)
+        for name, count in dropped.items():
+            print(f"{name} notifier is behind; dropped {count} reminder(s)")
+            if self.metrics:
+                self.metrics.notify_failures.inc(name, count)
+
+    async def drain(self, lane):
+        while True:
+            if not self.closing:
+                await lane.ready.wait()
+            lane.ready.clear()
+            with self.lock:
+                batch = list(lane.pending)
+                lane.pending.clear()
+            if batch:
+                await self.deliver(lane.backend, batch)
+            elif self.closing:
+                return
+
+    async def deliver(self, backend, batch):
+        metrics = self.metrics
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                if metrics:
+                    metrics.notify_retries.inc(backend.name)
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(backend.send(batch), self.timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                error = e if str(e) else type(e).__name__
+                await backend.reset()
+                continue
+            if metrics:
+                metrics.notify_latency.observe(time.perf_counter() - started, backend.name)
+                metrics.notify_delivered.inc(backend.name, len(batch))
+            return True
+        print(f"{backend.name} notifier failed to deliver {len(batch)} reminder(s): {error}")
+        if metrics:
+            metrics.notify_failures.inc(backend.name, len(batch))
+        return False
+
+    async def shutdown(self):
+        # Let each lane send what it has queued, then drop the connections
+        self.closing = True
+        for lane in self.lanes:
+            lane.ready.set()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(lane.task for lane in self.lanes)), CLOSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("Gave up waiting for notifiers to deliver queued reminders")
+        for lane in self.lanes:
+            await lane.backend.close()
+
+    def close(self):
+        if self.loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop)
+        try:
+            future.result(CLOSE_TIMEOUT + 1)
+        except Exception as e:
+            print(f"Notifier shutdown error: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(1)
+        self.loop = None
@@ -0,0 +1,388 @@
+import json
+import os
+import select
+import sys
+import threading
+
+from engine import DEFAULT_SETTINGS, SETTINGS_FILE, DailySchedule
+
+# The settings.json shipped with the release uses an older schema
+LEGACY_SETTINGS_FILE = "settings.json"
+LEGACY_KEYS = {
+    "interval_min": "reminder_interval_min",
+}
+
+# stat() polling interval, only where the OS can't tell us about changes
+# (no inotify, kqueue or Windows change notifications): an edit made outside
+# the app can take this long to apply
+POLL_SECONDS = 60
+# kqueue watches open files only for change events (O_EVTONLY on macOS), so
+# they don't keep the volume busy
+OPEN_FOR_EVENTS = getattr(os, "O_EVTONLY", os.O_RDONLY)
+
+def normalize(raw):
+    # Accept either schema and return a full settings dict in the current one
+    settings = dict(DEFAULT_SETTINGS)
+    for key, value in raw.items():
+        settings[LEGACY_KEYS.get(key, key)] = value
+    return settings
+
+def validate(settings):
+    # Returns the compiled schedule; raises ValueError on bad values
+    for key in ("daily_goal_ml", "reminder_interval_min", "water_per_reminder"):
+        value = settings[key]
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError(f"{key} must be a positive integer")
+    if not isinstance(settings["custom_message"], str):
+        raise ValueError("custom_message must be a string")
+    custom_times = settings.get("custom_times") or []
+    if not isinstance(custom_times, list) or not all(isinstance(t, str) for t in custom_times):
+        raise ValueError("custom_times must be a list of HH:MM strings")
+    return DailySchedule.from_settings(settings)
+
+def write_atomic(path, data):
+    # Write to a temp file in the same directory, then rename over the target,
+    # so a crash leaves either the old or the new file, never a truncated one
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class SettingsStore:
+    # Loads, validates, persists and watches one settings file. The last
+    # written/loaded settings are remembered so unchanged saves and our own
+    # writes don't touch the disk or trigger a reload.
+    def __init__(self, path=SETTINGS_FILE):
+        self.path = path
+        self.saved = None
+        self.watcher = None
+        self.stop_event = threading.Event()
+        self.stop_pipe = None
+        self.notification = None
+
+    def load(self):
+        # read(), then write the settings out if our file doesn't exist yet
+        settings, schedule = self.read()
+        if not os.path.exists(self.path):
+            try:
+                self.save(settings)
+            except OSError:
+                pass
+        else:
+            self.saved = settings
+        return settings, schedule
+
+    def read(self):
+        # (settings, schedule), falling back to the shipped settings.json and
+        # then to defaults; a broken file never stops the app
+        settings = None
+        for path in (self.path, LEGACY_SETTINGS_FILE):
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r") as f:
+                    settings = normalize(json.load(f))
+                schedule = validate(settings)
+                break
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                print(f"Ignoring settings in {path}: {e}")
+                settings = None
+        if settings is None:
+            settings = dict(DEFAULT_SETTINGS)
+            schedule = validate(settings)
+        return settings, schedule
+
+    def save(self, settings):
+        # Returns False when nothing changed since the last load/save
+        if settings == self.saved:
+            return False
+        # Remember first so the watcher recognises our own write
+        previous, self.saved = self.saved, dict(settings)
+        try:
+            write_atomic(self.path, json.dumps(settings, indent=4))
+        except:
+            self.saved = previous
+            raise
+        return True
+
+    def reload(self):
+        # New (settings, schedule) if the file changed and is valid, else None
+        try:
+            with open(self.path, "r") as f:
+                settings = normalize(json.load(f))
+            schedule = validate(settings)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Ignoring settings change in {self.path}: {e}")
+            return None
+        if settings == self.saved:
+            return None
+        self.saved = settings
+        return settings, schedule
+
+    def watch(self, callback):
+        # callback(settings, schedule) runs on the watcher thread
+        self.stop_event.clear()
+        target = self.watch_polling
+        if sys.platform.startswith("linux"):
+            self.stop_pipe = os.pipe()
+            target = self.watch_inotify
+        elif hasattr(select, "kqueue"):
+            self.stop_pipe = os.pipe()
+            target = self.watch_kqueue
+        elif sys.platform == "win32":
+            try:
+                self.notification = ChangeNotification(os.path.dirname(os.path.abspath(self.path)))
+                target = self.watch_windows
+            except OSError:
+                pass
+        self.watcher = threading.Thread(target=target, args=(callback,), daemon=True)
+        self.watcher.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.stop_pipe:
+            os.write(self.stop_pipe[1], b"\0")
+        if self.notification:
+            self.notification.stop()
+
+    def changed(self, callback):
+        result = self.reload()
+        if result:
+            callback(*result)
+
+    def watch_polling(self, callback):
+        last = self.stat()
+        while not self.stop_event.wait(POLL_SECONDS):
+            current = self.stat()
+            if current != last:
+                last = current
+                self.changed(callback)
+
+    def stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_mtime_ns, st.st_size, st.st_ino
+        except OSError:
+            return None
+
+    def watch_inotify(self, callback):
+        name = os.path.basename(self.path).encode()
+        try:
+            inotify = Inotify(os.path.dirname(os.path.abspath(self.path)))
+        except OSError:
+            inotify = None
+        if inotify is None:
+            return self.watch_polling(callback)
+        try:
+            while not self.stop_event.is_set():
+                ready, _, _ = select.select([inotify.fd, self.stop_pipe[0]], [], [])
+                if self.stop_pipe[0] in ready:
+                    break
+                if name in inotify.read_names():
+                    self.changed(callback)
+        finally:
+            inotify.close()
+            self.close_stop_pipe()
+
+    def watch_kqueue(self, callback):
+        try:
+            kqueue = KqueueWatch(self.path, self.stop_pipe[0])
+        except OSError:
+            return self.watch_polling(callback)
+        last = self.stat()
+        try:
+            while kqueue.wait():
+                current = self.stat()
+                if current != last:
+                    last = current
+                    # An atomic save leaves a new inode behind
+                    kqueue.watch_file()
+                    self.changed(callback)
+        finally:
+            kqueue.close()
+            self.close_stop_pipe()
+
+    def watch_windows(self, callback):
+        # The notification fires for any file in the directory; stat() tells
+        # whether it was ours
+        notification = self.notification
+        last = self.stat()
+        try:
+            while notification.wait():
+                current = self.stat()
+                if current != last:
+                    last = current
+                    self.changed(callback)
+        finally:
+            self.notification = None
+            notification.close()
+
+    def close_stop_pipe(self):
+        for fd in self.stop_pipe:
+            os.close(fd)
+        self.stop_pipe = None
+
+class StaticSettings:
+    # Drop-in for SettingsStore holding fixed in-memory settings (simulations)
+    def __init__(self, settings):
+        self.settings = normalize(settings)
+
+    def load(self):
+        return dict(self.settings), validate(self.settings)
+
+    def save(self, settings):
+        return False
+
+    def reload(self):
+        return None
+
+    def watch(self, callback):
+        pass
+
+    def stop(self):
+        pass
+
+class Inotify:
+    # Minimal ctypes binding: watch a directory for files being written or
+    # renamed into place (atomic saves replace the inode, so watching the
+    # file itself would lose track after the first edit)
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch failed")
+
+    def read_names(self):
+        # Names of the files touched by the pending events
+        import struct
+        data = os.read(self.fd, 64 * 1024)
+        names = set()
+        offset = 0
+        while offset + 16 <= len(data):
+            _, _, _, length = struct.unpack_from("iIII", data, offset)
+            names.add(data[offset + 16:offset + 16 + length].rstrip(b"\0"))
+            offset += 16 + length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class KqueueWatch:
+    # kqueue (macOS, BSD) on the directory, for files renamed into place, and
+    # on the file itself, for in-place writes; stop_fd becoming readable ends
+    # the wait
+    def __init__(self, path, stop_fd):
+        self.path = path
+        self.stop_fd = stop_fd
+        self.kq = select.kqueue()
+        self.file_fd = None
+        try:
+            self.dir_fd = os.open(os.path.dirname(os.path.abspath(path)), OPEN_FOR_EVENTS)
+        except OSError:
+            self.kq.close()
+            raise
+        self.kq.control([
+            select.kevent(self.dir_fd, select.KQ_FILTER_VNODE,
+                          select.KQ_EV_ADD | select.KQ_EV_CLEAR, select.KQ_NOTE_WRITE),
+            select.kevent(stop_fd, select.KQ_FILTER_READ, select.KQ_EV_ADD),
+        ], 0)
+        self.watch_file()
+
+    def watch_file(self):
+        # (Re)open the file under its path; it may not exist yet
+        if self.file_fd is not None:
+            os.close(self.file_fd)
+            self.file_fd = None
+        try:
+            self.file_fd = os.open(self.path, OPEN_FOR_EVENTS)
+        except OSError:
+            return
+        fflags = (select.KQ_NOTE_WRITE | select.KQ_NOTE_EXTEND
+                  | select.KQ_NOTE_DELETE | select.KQ_NOTE_RENAME)
+        self.kq.control([select.kevent(self.file_fd, select.KQ_FILTER_VNODE,
+                                       select.KQ_EV_ADD | select.KQ_EV_CLEAR, fflags)], 0)
+
+    def wait(self):
+        # Blocks; True when something changed, False once stopped
+        events = self.kq.control(None, 8)
+        return not any(event.ident == self.stop_fd for event in events)
+
+    def close(self):
+        if self.file_fd is not None:
+            os.close(self.file_fd)
+        os.close(self.dir_fd)
+        self.kq.close()
+
+class ChangeNotification:
+    # Minimal ctypes binding for FindFirstChangeNotification (Windows) on a
+    # directory, waited on together with an event that stop() sets
+    FILE_NOTIFY_CHANGE_FILE_NAME = 0x00000001
+    FILE_NOTIFY_CHANGE_LAST_WRITE = 0x00000010
+    INFINITE = 0xFFFFFFFF
+    WAIT_OBJECT_0 = 0
+
+    def __init__(self, directory):
+        import ctypes
+        from ctypes import wintypes
+        kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        kernel32.FindFirstChangeNotificationW.argtypes = (wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD)
+        kernel32.FindFirstChangeNotificationW.restype = wintypes.HANDLE
+        kernel32.FindNextChangeNotification.argtypes = (wintypes.HANDLE,)
+        kernel32.FindCloseChangeNotification.argtypes = (wintypes.HANDLE,)
+        kernel32.CreateEventW.argtypes = (ctypes.c_void_p, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR)
+        kernel32.CreateEventW.restype = wintypes.HANDLE
+        kernel32.SetEvent.argtypes = (wintypes.HANDLE,)
+        kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+        kernel32.WaitForMultipleObjects.argtypes = (wintypes.DWORD, ctypes.POINTER(wintypes.HANDLE),
+                                                    wintypes.BOOL, wintypes.DWORD)
+        kernel32.WaitForMultipleObjects.restype = wintypes.DWORD
+        self.kernel32 = kernel32
+        mask = self.FILE_NOTIFY_CHANGE_FILE_NAME | self.FILE_NOTIFY_CHANGE_LAST_WRITE
+        self.handle = kernel32.FindFirstChangeNotificationW(directory, False, mask)
+        if self.handle in (None, ctypes.c_void_p(-1).value):
+            raise ctypes.WinError(ctypes.get_last_error())
+        self.stop_handle = kernel32.CreateEventW(None, True, False, None)
+        if not self.stop_handle:
+            error = ctypes.WinError(ctypes.get_last_error())
+            kernel32.FindCloseChangeNotification(self.handle)
+            raise error
+        self.handles = (wintypes.HANDLE * 2)(self.handle, self.stop_handle)
+
+    def wait(self):
+        # Blocks; True when the directory changed, False once stopped
+        import ctypes
+        result = self.kernel32.WaitForMultipleObjects(2, self.handles, False, self.INFINITE)
+        if result != self.WAIT_OBJECT_0:
+            return False
+        if not self.kernel32.FindNextChangeNotification(self.handle):
+            raise ctypes.WinError(ctypes.get_last_error())
+        return True
+
+    def stop(self):
+        self.kernel32.SetEvent(self.stop_handle)
+
+    def close(self):
+        self.kernel32.FindCloseChangeNotification(self.handle)
+        self.kernel32.CloseHandle(self.stop_handle)
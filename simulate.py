@@ -0,0 +1,210 @@
+import datetime
+from bisect import bisect_left, bisect_right
+
+from clock import VirtualClock
+from engine import ReminderEngine
+from fleet import FleetScheduler
+from history import NullHistory
+from settings_store import StaticSettings, normalize, validate
+
+# Firing-error histogram resolution and range (errors past the range land in
+# the last bucket)
+ERROR_BUCKET_SECONDS = 0.1
+ERROR_BUCKETS = 36000
+
+class ErrorStats:
+    # Running firing-error summary in constant memory
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * ERROR_BUCKETS
+
+    def add(self, error):
+        self.count += 1
+        self.total += error
+        if error > self.max:
+            self.max = error
+        self.buckets[min(int(error / ERROR_BUCKET_SECONDS), ERROR_BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= rank:
+                return round(min((index + 1) * ERROR_BUCKET_SECONDS, self.max), 3)
+        return round(self.max, 3)
+
+    def summary(self):
+        return {
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "p99": self.percentile(0.99),
+            "max": round(self.max, 3),
+        }
+
+class ProfileTracker:
+    # Matches one profile's fires, which arrive in time order, to its slots
+    def __init__(self, profile_id, schedule, start, stop):
+        self.id = profile_id
+        self.offsets = schedule.offsets
+        self.start = start
+        self.expected = expected_slots(schedule, start, stop)
+        self.fired = 0
+        self.matched = 0
+        self.duplicates = 0
+        self.unexpected = 0
+        self.last_slot = None
+
+    def record(self, moment):
+        # Returns (slot, error_seconds); slot is None for a fire outside the schedule
+        self.fired += 1
+        midnight = datetime.datetime.combine(moment.date(), datetime.time())
+        minute = (moment - midnight).total_seconds() / 60
+        index = bisect_right(self.offsets, minute) - 1
+        if index < 0:
+            self.unexpected += 1
+            return None, None
+        slot = midnight + datetime.timedelta(minutes=self.offsets[index])
+        if slot < self.start:
+            self.unexpected += 1
+            return None, None
+        if slot == self.last_slot:
+            self.duplicates += 1
+        else:
+            self.matched += 1
+            self.last_slot = slot
+        return slot, (moment - slot).total_seconds()
+
+    def summary(self):
+        return {
+            "expected": self.expected,
+            "fired": self.fired,
+            "missed": self.expected - self.matched,
+            "duplicates": self.duplicates,
+            "unexpected": self.unexpected,
+        }
+
+class SimulatedNotifier:
+    def __init__(self, simulation, tracker, clock):
+        self.simulation = simulation
+        self.tracker = tracker
+        self.clock = clock
+
+    def notify(self, message, amount):
+        self.simulation.record(self.tracker, self.clock.now(), amount)
+
+class Simulation:
+    # Runs schedules under a VirtualClock and checks every fire against the
+    # slots the schedule says should have fired between start and stop
+    def __init__(self, profiles, start, days, jitter=0.0, seed=None, on_fire=None):
+        self.profiles = {profile_id: normalize(settings) for profile_id, settings in profiles.items()}
+        self.start = start
+        self.stop = start + datetime.timedelta(days=days)
+        self.days = days
+        self.jitter = jitter
+        self.seed = seed
+        self.on_fire = on_fire
+        self.trackers = {}
+        self.errors = ErrorStats()
+        self.wakeups = 0
+
+    def tracker(self, profile_id, schedule):
+        tracker = ProfileTracker(profile_id, schedule, self.start, self.stop)
+        self.trackers[profile_id] = tracker
+        return tracker
+
+    def record(self, tracker, moment, amount):
+        slot, error = tracker.record(moment)
+        if error is not None:
+            self.errors.add(error)
+        if self.on_fire:
+            self.on_fire(tracker.id, moment, slot, error, amount)
+
+    def clock(self, salt):
+        seed = None if self.seed is None else f"{self.seed}:{salt}"
+        return VirtualClock(self.start, self.stop, jitter=self.jitter, seed=seed)
+
+    def run_engines(self):
+        # One ReminderEngine per profile, exactly as the app and daemon run it
+        for profile_id, settings in self.profiles.items():
+            clock = self.clock(profile_id)
+            notifier = SimulatedNotifier(self, self.tracker(profile_id, validate(settings)), clock)
+            engine = ReminderEngine(notifier=notifier, store=StaticSettings(settings),
+                                    history=NullHistory(), clock=clock)
+            clock.on_stop = engine.stop
+            engine.run()
+            self.wakeups += clock.waits
+
+    def run_fleet(self):
+        # Every profile in one FleetScheduler, as `--headless --profiles` runs them
+        clock = self.clock("fleet")
+        trackers = {}
+
+        def dispatch(profile, key):
+            self.record(trackers[profile.id], clock.now(), profile.water_per_reminder)
+
+        fleet = FleetScheduler(dispatch, clock=clock)
+        clock.on_stop = fleet.stop
+        for profile_id, settings in self.profiles.items():
+            profile = fleet.add_profile(profile_id, settings, self.start)
+            trackers[profile_id] = self.tracker(profile_id, profile.schedule)
+        fleet.run()
+        self.wakeups += clock.waits
+
+    def run(self, mode="engine"):
+        if mode == "fleet":
+            self.run_fleet()
+        else:
+            self.run_engines()
+        return self.report()
+
+    def report(self):
+        profiles = {profile_id: tracker.summary() for profile_id, tracker in self.trackers.items()}
+        totals = {key: sum(summary[key] for summary in profiles.values())
+                  for key in ("expected", "fired", "missed", "duplicates", "unexpected")}
+        return {
+            "start": self.start.isoformat(),
+            "days": self.days,
+            "jitter_seconds": self.jitter,
+            "profiles": len(profiles),
+            **totals,
+            "wakeups": self.wakeups,
+            "error_seconds": self.errors.summary(),
+            "by_profile": profiles,
+        }
+
+def expected_slots(schedule, start, stop):
+    # How many slots fall in [start, stop)
+    offsets = schedule.offsets
+    first = bisect_left(offsets, ceil_minute(start))
+    last = bisect_left(offsets, ceil_minute(stop))
+    days = (stop.date() - start.date()).days
+    if days == 0:
+        return max(last - first, 0)
+    return len(offsets) - first + (days - 1) * len(offsets) + last
+
+def ceil_minute(moment):
+    return moment.hour * 60 + moment.minute + (1 if moment.second or moment.microsecond else 0)
+
+def format_report(report):
+    lines = [
+        f"Simulated {report['days']} day(s) from {report['start']} for "
+        f"{report['profiles']} profile(s), jitter {report['jitter_seconds']}s",
+        f"  expected {report['expected']}  fired {report['fired']}  "
+        f"missed {report['missed']}  duplicates {report['duplicates']}  "
+        f"unexpected {report['unexpected']}",
+        f"  firing error (s): mean {report['error_seconds']['mean']}  "
+        f"p99 {report['error_seconds']['p99']}  max {report['error_seconds']['max']}",
+        f"  loop wakeups: {report['wakeups']}",
+    ]
+    problems = [(profile_id, summary) for profile_id, summary in report["by_profile"].items()
+                if summary["missed"] or summary["duplicates"] or summary["unexpected"]]
+    for profile_id, summary in problems[:20]:
+        lines.append(f"  {profile_id}: missed {summary['missed']}  "
+                     f"duplicates {summary['duplicates']}  unexpected {summary['unexpected']}")
+    if len(problems) > 20:
+        lines.append(f"  ... and {len(problems) - 20} more profile(s) with problems")
+    return "\n".join(lines)
@@ -0,0 +1,348 @@
+import hashlib
+import multiprocessing
+import os
+import signal
+import time
+from bisect import bisect_right
+from multiprocessing.connection import wait
+
+from clock import SystemClock
+from engine import MAX_SLEEP_SECONDS
+from fleet import FleetScheduler, key_to_datetime, minute_key
+from history import HistoryLog
+from settings_store import normalize, validate
+
+# Points per worker on the hash ring; more points, more even shards
+REPLICAS = 128
+
+# Workers start as fresh interpreters, not forks: by the time they are
+# started the parent already runs threads (metrics server, notifier loop)
+# that a fork would copy mid-flight
+CONTEXT = multiprocessing.get_context("spawn")
+
+def ring_hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+class HashRing:
+    # Consistent hashing: each worker owns the arcs before its points, so
+    # adding or removing a worker only moves the profiles on its arcs
+    # (about 1/N of them).
+    def __init__(self, workers=(), replicas=REPLICAS):
+        self.replicas = replicas
+        self.points = []
+        self.owners = []
+        for worker in workers:
+            self.add(worker)
+
+    def add(self, worker):
+        for replica in range(self.replicas):
+            point = ring_hash(f"{worker}#{replica}")
+            index = bisect_right(self.points, point)
+            self.points.insert(index, point)
+            self.owners.insert(index, worker)
+
+    def remove(self, worker):
+        keep = [(point, owner) for point, owner in zip(self.points, self.owners) if owner != worker]
+        self.points = [point for point, _ in keep]
+        self.owners = [owner for _, owner in keep]
+
+    def owner(self, key):
+        if not self.points:
+            return None
+        index = bisect_right(self.points, ring_hash(key))
+        return self.owners[index % len(self.owners)]
+
+class Worker:
+    # One shard: a FleetScheduler driven from the supervisor pipe. Reminders
+    # fired in a tick go back as one batch, with counters since the last one.
+    def __init__(self, worker_id, conn, history=None, clock=None, live=True):
+        # live=False: no ticks on the real clock, only replays on command
+        self.id = worker_id
+        self.live = live
+        self.conn = conn
+        self.clock = clock or SystemClock()
+        self.fleet = FleetScheduler(self.dispatch, history, self.clock)
+        self.outbox = []
+        self.drifts = []
+        self.iterations = 0
+        self.errors = 0
+        self.running = False
+
+    def dispatch(self, profile, key):
+        # The per-reminder work (history line, message) happens here, in
+        # this process, not in the supervisor
+        self.outbox.append((profile.id, key, profile.water_per_reminder,
+                            f"{profile.id}: {profile.custom_message}"))
+        if self.live:
+            self.drifts.append((self.clock.now() - key_to_datetime(key)).total_seconds())
+
+    def flush(self):
+        if not self.outbox and not self.iterations and not self.errors:
+            return
+        stats = {"iterations": self.iterations, "errors": self.errors,
+                 "next_due": self.fleet.next_due()}
+        self.conn.send(("events", self.id, self.outbox, self.drifts, stats))
+        self.outbox = []
+        self.drifts = []
+        self.iterations = self.errors = 0
+
+    def handle(self, message):
+        command = message[0]
+        if command == "add":
+            for profile_id, settings, now in message[1]:
+                self.fleet.add_profile(profile_id, settings, now or self.clock.now())
+        elif command == "remove":
+            for profile_id in message[1]:
+                self.fleet.remove_profile(profile_id)
+        elif command == "replay":
+            self.replay(message[1], message[2])
+        elif command == "stop":
+            self.running = False
+
+    def replay(self, first_key, minutes):
+        # Tick through simulated minutes as fast as possible
+        fired = 0
+        started = time.perf_counter()
+        for key in range(first_key, first_key + minutes):
+            fired += self.fleet.tick(key)
+            self.flush()
+        seconds = time.perf_counter() - started
+        self.conn.send(("replayed", self.id, fired, seconds))
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.iterations += 1
+            try:
+                if not self.live:
+                    self.handle(self.conn.recv())
+                    continue
+                self.fleet.tick(minute_key(self.clock.now()))
+                self.flush()
+                key = self.fleet.next_due()
+                timeout = MAX_SLEEP_SECONDS
+                if key is not None:
+                    delay = (key_to_datetime(key) - self.clock.now()).total_seconds()
+                    timeout = min(max(delay, 0), MAX_SLEEP_SECONDS)
+                # Commands from the supervisor wake us early
+                while self.running and self.conn.poll(timeout):
+                    self.handle(self.conn.recv())
+                    timeout = 0
+            except (EOFError, BrokenPipeError):
+                # The supervisor is gone
+                break
+            except Exception as e:
+                print(f"Worker {self.id} error: {e}")
+                self.errors += 1
+                time.sleep(1)
+        if self.fleet.history:
+            self.fleet.history.close()
+
+def worker_main(worker_id, conn, history_path=None, live=True):
+    # Ctrl+C and SIGTERM reach the whole process group; the supervisor stops
+    # us with a message instead, so the history log is flushed on the way out
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    history = HistoryLog(f"{history_path}.{worker_id}") if history_path else None
+    Worker(worker_id, conn, history, live=live).run()
+
+class WorkerHandle:
+    __slots__ = ("id", "process", "conn", "next_due")
+
+    def __init__(self, worker_id, process, conn):
+        self.id = worker_id
+        self.process = process
+        self.conn = conn
+        self.next_due = None
+
+class Supervisor:
+    # Shards a profile roster over worker processes, each running its own
+    # scheduler, so per-reminder work isn't serialized on one GIL. Workers
+    # stream fired reminders back; on_events(events) gets each batch of
+    # (profile_id, key, amount, message). Each worker writes its own
+    # history log, <history>.<worker id>.
+    def __init__(self, workers=None, on_events=None, history=None, metrics=None, live=True):
+        # live=False keeps workers off the real clock, for replay()
+        self.worker_count = workers or os.cpu_count() or 1
+        self.live = live
+        self.on_events = on_events
+        self.history = history
+        self.metrics = metrics
+        self.ring = HashRing()
+        self.workers = {}
+        self.next_worker_id = 0
+        # profile id -> (settings, worker id)
+        self.profiles = {}
+        self.running = False
+        # worker id -> (fired, seconds) from the last replay
+        self.replayed = {}
+        self.wake_recv, self.wake_send = CONTEXT.Pipe(duplex=False)
+
+    def start(self):
+        for _ in range(self.worker_count):
+            self.add_worker()
+
+    def spawn(self, worker_id):
+        conn, child_conn = CONTEXT.Pipe()
+        process = CONTEXT.Process(target=worker_main, name=f"hydrator-worker-{worker_id}",
+                                          args=(worker_id, child_conn, self.history, self.live),
+                                          daemon=True)
+        process.start()
+        child_conn.close()
+        self.workers[worker_id] = WorkerHandle(worker_id, process, conn)
+
+    def add_worker(self):
+        worker_id = self.next_worker_id
+        self.next_worker_id += 1
+        self.spawn(worker_id)
+        self.ring.add(worker_id)
+        self.rebalance()
+        return worker_id
+
+    def remove_worker(self, worker_id):
+        worker = self.workers.pop(worker_id)
+        self.ring.remove(worker_id)
+        self.send(worker, ("stop",))
+        self.rebalance()
+        worker.process.join(5)
+
+    def rebalance(self):
+        # Move only the profiles whose owner changed
+        moves = {}
+        for profile_id, (settings, current) in self.profiles.items():
+            owner = self.ring.owner(profile_id)
+            if owner != current:
+                moves[profile_id] = (settings, current, owner)
+        self.assign(moves, None)
+
+    def add_profile(self, profile_id, settings, now=None):
+        self.add_profiles({profile_id: settings}, now)
+
+    def add_profiles(self, profiles, now=None):
+        # Raises ValueError if any settings don't compile, before sending
+        # anything. now: schedule from this time instead of the worker's
+        # clock (replays).
+        moves = {}
+        for profile_id, settings in profiles.items():
+            settings = normalize(settings)
+            validate(settings)
+            old = self.profiles.get(profile_id)
+            moves[profile_id] = (settings, old[1] if old else None, self.ring.owner(profile_id))
+        self.assign(moves, now)
+
+    def assign(self, moves, now):
+        # moves: profile id -> (settings, old worker, new worker); one
+        # message per worker rather than one per profile
+        removes = {}
+        adds = {}
+        for profile_id, (settings, old, new) in moves.items():
+            if old is not None and old != new and old in self.workers:
+                removes.setdefault(old, []).append(profile_id)
+            self.profiles[profile_id] = (settings, new)
+            adds.setdefault(new, []).append((profile_id, settings, now))
+        for worker_id, profile_ids in removes.items():
+            self.send(self.workers[worker_id], ("remove", profile_ids))
+        for worker_id, entries in adds.items():
+            self.send(self.workers[worker_id], ("add", entries))
+
+    def remove_profile(self, profile_id):
+        entry = self.profiles.pop(profile_id, None)
+        if entry and entry[1] in self.workers:
+            self.send(self.workers[entry[1]], ("remove", [profile_id]))
+
+    def send(self, worker, message):
+        # Take in what the worker has sent first: if both sides blocked
+        # writing into full pipes neither would ever read
+        try:
+            while worker.conn.poll():
+                self.receive(worker.conn.recv())
+            worker.conn.send(message)
+        except (EOFError, OSError):
+            # Picked up as a dead worker by the receive loop
+            pass
+
+    def next_due(self):
+        keys = [worker.next_due for worker in self.workers.values() if worker.next_due is not None]
+        return min(keys) if keys else None
+
+    def receive(self, message):
+        kind, worker_id = message[0], message[1]
+        if kind == "events":
+            _, _, events, drifts, stats = message
+            worker = self.workers.get(worker_id)
+            if worker:
+                worker.next_due = stats["next_due"]
+            metrics = self.metrics
+            if metrics:
+                if events:
+                    metrics.reminders_fired.inc(amount=len(events))
+                for drift in drifts:
+                    metrics.reminder_drift.observe(drift)
+                if stats["iterations"]:
+                    metrics.loop_iterations.inc(amount=stats["iterations"])
+                if stats["errors"]:
+                    metrics.loop_errors.inc(amount=stats["errors"])
+            if events and self.on_events:
+                self.on_events(events)
+        elif kind == "replayed":
+            self.replayed[worker_id] = message[2:]
+
+    def restart(self, worker):
+        # A crashed worker comes back with the same id and its profiles
+        print(f"Worker {worker.id} exited with code {worker.process.exitcode}; restarting")
+        worker.conn.close()
+        self.spawn(worker.id)
+        entries = [(profile_id, settings, None)
+                   for profile_id, (settings, owner) in self.profiles.items() if owner == worker.id]
+        if entries:
+            self.send(self.workers[worker.id], ("add", entries))
+
+    def poll(self, timeout=None):
+        # Handle whatever the workers send within timeout (None: block until a
+        # worker says something, dies, or stop() writes to the wake pipe)
+        conns = {worker.conn: worker for worker in self.workers.values()}
+        for conn in wait(list(conns) + [self.wake_recv], timeout):
+            if conn is self.wake_recv:
+                conn.recv()
+                continue
+            worker = conns[conn]
+            try:
+                while conn.poll():
+                    self.receive(conn.recv())
+            except (EOFError, OSError):
+                if self.running and self.workers.get(worker.id) is worker:
+                    self.restart(worker)
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self.poll()
+
+    def replay(self, first_key, minutes):
+        # Benchmark: every worker ticks through the same simulated minutes;
+        # returns (reminders fired, wall seconds)
+        started = time.perf_counter()
+        self.replayed = {}
+        for worker in self.workers.values():
+            self.send(worker, ("replay", first_key, minutes))
+        while len(self.replayed) < len(self.workers):
+            self.poll()
+        return sum(fired for fired, _ in self.replayed.values()), time.perf_counter() - started
+
+    def stop(self):
+        self.running = False
+        self.wake_send.send(None)
+
+    def close(self):
+        self.running = False
+        for worker in self.workers.values():
+            self.send(worker, ("stop",))
+        for worker in self.workers.values():
+            worker.process.join(5)
+            if worker.process.is_alive():
+                # SIGTERM is ignored in workers
+                worker.process.kill()
+            worker.conn.close()
+        self.workers = {}
+        if self.metrics:
+            self.metrics.close()